@@ -0,0 +1,15 @@
+-- Delete everything stored for a project in one transaction.
+--
+-- supabase_utils.delete_project_context and delete_project call this via
+-- POST /rest/v1/rpc/delete_project_cascade so removing a project costs a
+-- single round trip instead of one DELETE per table.
+
+create or replace function delete_project_cascade (
+    pid text
+) returns void as $$
+begin
+    delete from project_contexts where project_id = pid;
+    delete from files where project_id = pid;
+    delete from chat_messages where project_id = pid;
+end;
+$$ language plpgsql;
@@ -0,0 +1,20 @@
+-- Chunk position and a unique key on file_chunks so re-indexing upserts.
+--
+-- supabase_utils writes chunks with
+-- POST /rest/v1/file_chunks?on_conflict=project_id,file_name,chunk_index and
+-- Prefer: resolution=merge-duplicates, so uploading the same file again
+-- overwrites its chunks in place instead of appending duplicates.  Existing
+-- rows are numbered in insertion order per project and file.
+
+ALTER TABLE file_chunks ADD COLUMN IF NOT EXISTS chunk_index INTEGER;
+
+UPDATE file_chunks AS f
+SET chunk_index = n.idx
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY project_id, file_name ORDER BY id) - 1 AS idx
+    FROM file_chunks
+) AS n
+WHERE f.id = n.id AND f.chunk_index IS NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_file_chunks_position
+    ON file_chunks(project_id, file_name, chunk_index);
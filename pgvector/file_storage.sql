@@ -0,0 +1,8 @@
+-- Migration adding the Supabase Storage object path to files.
+--
+-- supabase_utils.save_uploaded_file uploads the original document bytes to
+-- the SUPABASE_STORAGE_BUCKET bucket (default "grant-files") under a
+-- SHA-256 content hash and records "<bucket>/<hash>.<ext>" here.  The bucket
+-- itself must be created in the Supabase dashboard or via the Storage API.
+
+ALTER TABLE files ADD COLUMN IF NOT EXISTS storage_path TEXT;
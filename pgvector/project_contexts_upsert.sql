@@ -0,0 +1,8 @@
+-- Unique project_id on project_contexts so the row can be upserted.
+--
+-- supabase_utils.update_project_info writes with
+-- POST /rest/v1/project_contexts?on_conflict=project_id and
+-- Prefer: resolution=merge-duplicates, which needs a unique index on the
+-- conflict column.  Remove duplicate rows per project before applying.
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_project_contexts_project_id ON project_contexts(project_id);
@@ -0,0 +1,16 @@
+-- Per-project file counts for supabase_utils.get_all_projects.
+--
+-- Aggregating here means the API transfers one row per project instead of
+-- one row per uploaded file.
+
+create or replace view project_summary as
+select
+    project_id,
+    count(*) as file_count,
+    max(created_at) as updated_at
+from
+    files
+where
+    project_id is not null
+group by
+    project_id;
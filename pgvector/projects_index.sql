@@ -0,0 +1,6 @@
+-- Index backing the project dashboard query.
+--
+-- supabase_utils.get_all_projects_from_db lists projects newest first with
+-- a row limit; this index lets Postgres return them without a sort.
+
+CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects(created_at DESC);
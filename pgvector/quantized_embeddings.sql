@@ -0,0 +1,9 @@
+-- Migration adding int8-quantized embedding storage to file_chunks.
+--
+-- When QUANTIZE_EMBEDDINGS is enabled, supabase_utils also stores each
+-- chunk embedding as int8 bytes plus a per-vector float scale, alongside
+-- the float vector that retrieval orders by.  The original values are
+-- approximately scale * int8.
+
+ALTER TABLE file_chunks ADD COLUMN IF NOT EXISTS embedding_int8 BYTEA;
+ALTER TABLE file_chunks ADD COLUMN IF NOT EXISTS embedding_scale REAL;
@@ -0,0 +1,21 @@
+-- Best matching chunk text for the rag_context Edge Function.
+--
+-- Returns a single text value instead of rows, so neither the Edge Function
+-- nor supabase_utils.rag_context receives columns it would throw away.
+
+create or replace function rag_context_top_chunk (
+    query_embedding vector(1536),
+    file_names text[],
+    p_project_id text
+) returns text as $$
+    select
+        t.chunk_text
+    from
+        file_chunks as t
+    where
+        t.file_name = any(file_names)
+        and t.project_id = p_project_id
+    order by
+        t.embedding <-> query_embedding
+    limit 1;
+$$ language sql stable;
@@ -0,0 +1,29 @@
+-- Atomically replace the questions stored for a project.
+--
+-- supabase_utils.save_questions calls this via
+-- POST /rest/v1/rpc/save_questions with the new rows as a JSON array, so
+-- the delete and insert share one transaction and one round trip.
+
+create or replace function save_questions (
+    p_project_id integer,
+    p_rows jsonb
+) returns void as $$
+begin
+    delete from questions where project_id = p_project_id;
+    insert into questions (question, answer, project_id, embedding, chat_history)
+    select
+        r.question,
+        r.answer,
+        r.project_id,
+        r.embedding::vector,
+        r.chat_history
+    from
+        jsonb_to_recordset(p_rows) as r (
+            question text,
+            answer text,
+            project_id integer,
+            embedding text,
+            chat_history text
+        );
+end;
+$$ language plpgsql;
@@ -0,0 +1,21 @@
+-- Let Postgres own the bookkeeping timestamps.
+--
+-- supabase_utils no longer sends created_at / updated_at / timestamp
+-- values; the columns default to now() and a trigger refreshes updated_at
+-- whenever a project_contexts row is written (including upserts).
+
+ALTER TABLE project_contexts ALTER COLUMN created_at SET DEFAULT now();
+ALTER TABLE project_contexts ALTER COLUMN updated_at SET DEFAULT now();
+ALTER TABLE chat_messages ALTER COLUMN timestamp SET DEFAULT now();
+
+create or replace function set_updated_at () returns trigger as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$ language plpgsql;
+
+DROP TRIGGER IF EXISTS project_contexts_set_updated_at ON project_contexts;
+CREATE TRIGGER project_contexts_set_updated_at
+    BEFORE UPDATE ON project_contexts
+    FOR EACH ROW EXECUTE FUNCTION set_updated_at();
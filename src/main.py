@@ -5,7 +5,7 @@ from datetime import datetime
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
 app = FastAPI(title="GET$ API", version="1.0.0")
 
@@ -44,13 +44,13 @@ except ImportError as e:
 
 # Import other utilities
 try:
-    from .utils.storage_utils import OrganizationInfo, RFPDocument, ProjectResponse
+    from .utils.storage_utils import OrganizationInfo, RFPDocument, ProjectResponse, to_dict
     from .utils import supabase_utils as supa
     from .utils.rfp_analysis import analyze_rfp_content, analyze_organization_rfp_alignment
 except ImportError:
     # Fallback for direct import
     try:
-        from utils.storage_utils import OrganizationInfo, RFPDocument, ProjectResponse
+        from utils.storage_utils import OrganizationInfo, RFPDocument, ProjectResponse, to_dict
         from utils import supabase_utils as supa
         from utils.rfp_analysis import analyze_rfp_content, analyze_organization_rfp_alignment
     except ImportError:
@@ -58,6 +58,7 @@ except ImportError:
         OrganizationInfo = None
         RFPDocument = None
         ProjectResponse = None
+        to_dict = None
         supa = None
         analyze_rfp_content = None
         analyze_organization_rfp_alignment = None
@@ -80,6 +81,16 @@ except ImportError:
         chat_grant_assistant = None
         get_culturally_sensitive_response = None
 
+# Import specialized LLM utilities
+try:
+    from .utils.specialized_llm_utils import specialized_llm
+except ImportError:
+    # Fallback for direct import
+    try:
+        from utils.specialized_llm_utils import specialized_llm
+    except ImportError:
+        specialized_llm = None
+
 # Import prompt logging middleware
 try:
     from .middleware import prompt_logger
@@ -212,8 +223,9 @@ async def create_organization(request: dict):
             updated_at=datetime.now().isoformat()
         )
         
-        if supa.insert_organization(org.__dict__):
-            return {"success": True, "organization": org.__dict__}
+        org_data = to_dict(org)
+        if supa.insert_organization(org_data):
+            return {"success": True, "organization": org_data}
         else:
             return {"success": False, "error": "Failed to save organization"}
     except Exception as e:
@@ -240,20 +252,17 @@ async def upload_rfp(project_id: str, request: dict):
     try:
         from datetime import datetime
         
-        import base64, tempfile, os
+        import base64
         from pathlib import Path
-        # Handle possible base64 payload for binary documents
+        # Handle possible base64 payload for binary documents, extracted
+        # from memory like /upload
         raw_content = request.get('content', '')
         is_base64 = request.get('is_base64', False)
         if is_base64:
             file_bytes = base64.b64decode(raw_content)
             suffix = Path(request.get('filename','rfp')).suffix or '.bin'
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(file_bytes)
-                tmp_path = Path(tmp.name)
-            from .utils.file_utils import extract_text_from_file
-            content = extract_text_from_file(tmp_path, tmp_path.suffix.lower())
-            os.unlink(tmp_path)
+            from .utils.file_utils import extract_text_from_bytes
+            content = extract_text_from_bytes(file_bytes, suffix.lower())
         else:
             content = raw_content
         from .utils.rfp_analysis import analyze_rfp_content
@@ -275,9 +284,9 @@ async def upload_rfp(project_id: str, request: dict):
         
         # Save RFP document metadata and chunks in Supabase
         supa.save_uploaded_file(content.encode('utf-8'), rfp.filename, project_id)
-        supa.insert_file_chunks_into_db([(rfp.filename, chunk) for chunk in chunk_text(content)], project_id)
+        supa.save_file_chunks([(rfp.filename, chunk) for chunk in chunk_text(content)], project_id)
 
-        return {"success": True, "rfp": rfp.__dict__, "analysis": analysis}
+        return {"success": True, "rfp": to_dict(rfp), "analysis": analysis}
     except Exception as e:
         print(f"❌ Error uploading RFP: {e}")
         return {"success": False, "error": str(e)}
@@ -323,7 +332,7 @@ async def upload_file(request: dict):
         
         project_id = request.get('project_id', 'test-project')
         file_data = request.get('file', {})
-        import base64, tempfile, os
+        import base64
         from pathlib import Path
         filename = file_data.get('filename', 'uploaded_file')
         is_base64 = file_data.get('is_base64', False)
@@ -331,18 +340,10 @@ async def upload_file(request: dict):
 
         # If the payload is base64-encoded (binary files like PDF/DOCX)
         if is_base64:
-            # Decode bytes and write to a temp file so we can extract text
+            # Decode bytes and extract text in memory (PDF/DOCX/TXT)
             file_bytes = base64.b64decode(raw_content)
-            suffix = Path(filename).suffix or ".bin"
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(file_bytes)
-                tmp_path = Path(tmp.name)
-            # Extract text using file_utils helper (PDF/DOCX/TXT)
-            from .utils.file_utils import extract_text_from_file
-            extracted_text = extract_text_from_file(tmp_path, tmp_path.suffix.lower())
-            # Clean up temp file
-            os.unlink(tmp_path)
-            original_content = extracted_text
+            from .utils.file_utils import extract_text_from_bytes
+            original_content = extract_text_from_bytes(file_bytes, Path(filename).suffix.lower())
         else:
             original_content = raw_content
 
@@ -373,7 +374,7 @@ async def upload_file(request: dict):
         # Insert chunks and embeddings into Supabase
         try:
             chunk_pairs = [(filename, c) for c in chunks]
-            supa.insert_file_chunks_into_db(chunk_pairs, project_id)
+            supa.save_file_chunks(chunk_pairs, project_id)
             print(f"✅ File chunks and embeddings saved to Supabase for {filename}")
         except Exception as e:
             print(f"❌ Failed to save file chunks for {filename}: {e}")
@@ -402,32 +403,31 @@ async def get_project_context(project_id: str):
         
         try:
             # Query file_chunks table for this project
-            chunks_data = supa.query_data("file_chunks")
-            if chunks_data:
-                # Group by file_name to get unique files
-                files_dict = {}
-                for chunk in chunks_data:
-                    if chunk.get('project_id') == project_id:
-                        file_name = chunk.get('file_name', 'Unknown')
-                        chunk_text = chunk.get('chunk_text', '')
-                        
-                        if file_name not in files_dict:
-                            files_dict[file_name] = []
-                        
-                        files_dict[file_name].append(chunk_text)
+            chunks_data = supa.iter_rows(
+                "file_chunks",
+                f"project_id=eq.{project_id}&select=file_name,chunk_text",
+            )
+            # Group by file_name to get unique files
+            files_dict = {}
+            for chunk in chunks_data:
+                file_name = chunk.get('file_name', 'Unknown')
+                chunk_text = chunk.get('chunk_text', '')
+                    
+                if file_name not in files_dict:
+                    files_dict[file_name] = []
+                    
+                files_dict[file_name].append(chunk_text)
                 
-                # Create file info for each unique file
-                for file_name, chunks in files_dict.items():
-                    uploaded_files.append({
-                        "filename": file_name,
-                        "category": "uploaded_document",
-                        "content_length": sum(len(chunk) for chunk in chunks),
-                        "uploaded_at": datetime.now().isoformat()
-                    })
+            # Create file info for each unique file
+            for file_name, chunks in files_dict.items():
+                uploaded_files.append({
+                    "filename": file_name,
+                    "category": "uploaded_document",
+                    "content_length": sum(len(chunk) for chunk in chunks),
+                    "uploaded_at": datetime.now().isoformat()
+                })
                 
-                print(f"🔍 DEBUG: Found {len(uploaded_files)} uploaded files from Supabase")
-            else:
-                print("🔍 DEBUG: No file chunks found in Supabase")
+            print(f"🔍 DEBUG: Found {len(uploaded_files)} uploaded files from Supabase")
         except Exception as e:
             print(f"⚠️ Error getting file chunks from Supabase: {e}")
         
@@ -502,7 +502,7 @@ async def send_message(request: dict):
         if uploaded_files:
             try:
                 # Search for relevant chunks based on user message
-                snippet = supa.rag_context(message, uploaded_files, project_id)
+                snippet = await supa.arag_context(message, uploaded_files, project_id)
                 if snippet:
                     relevant_snippets = [snippet]
                 print(f"🔍 DEBUG: Found {len(relevant_snippets)} relevant snippets")
@@ -517,7 +517,6 @@ async def send_message(request: dict):
             supa.save_chat_message(project_id, {
                 "user_message": message,
                 "ai_response": ai_response,
-                "timestamp": datetime.now().isoformat(),
                 "metadata": {"relevant_snippets": relevant_snippets}
             })
             print(f"✅ Chat message saved to database")
@@ -568,30 +567,32 @@ def get_project_context_data(project_id: str) -> dict:
         # Get file chunks from Supabase for this project
         try:
             # Query file_chunks table for this project
-            chunks_data = supa.query_data("file_chunks")
-            if chunks_data:
-                # Group by file_name to get unique files
-                files_dict = {}
-                for chunk in chunks_data:
-                    if chunk.get('project_id') == project_id:
-                        file_name = chunk.get('file_name', 'Unknown')
-                        chunk_text = chunk.get('chunk_text', '')
-                        
-                        if file_name not in files_dict:
-                            files_dict[file_name] = []
-                            uploaded_files.append(file_name)
-                        
-                        files_dict[file_name].append(chunk_text)
+            chunks_data = supa.iter_rows(
+                "file_chunks",
+                f"project_id=eq.{project_id}&select=file_name,chunk_text",
+            )
+            # Group by file_name to get unique files
+            files_dict = {}
+            for chunk in chunks_data:
+                file_name = chunk.get('file_name', 'Unknown')
+                chunk_text = chunk.get('chunk_text', '')
+                    
+                if file_name not in files_dict:
+                    files_dict[file_name] = []
+                    
+                files_dict[file_name].append(chunk_text)
                 
-                # Create content summaries for each file
-                for file_name, chunks in files_dict.items():
-                    content_summary = f"Document: {file_name}\nContent: {' '.join(chunks[:3])}..."  # First 3 chunks
-                    uploaded_content.append(content_summary)
+            # Only filled in once every chunk has been read, so a failed
+            # read leaves no partial file list behind
+            uploaded_files = list(files_dict)
+            
+            # Create content summaries for each file
+            for file_name, chunks in files_dict.items():
+                content_summary = f"Document: {file_name}\nContent: {' '.join(chunks[:3])}..."  # First 3 chunks
+                uploaded_content.append(content_summary)
                 
-                print(f"🔍 DEBUG: Found {len(uploaded_files)} uploaded files from Supabase")
-                print(f"🔍 DEBUG: Files: {uploaded_files}")
-            else:
-                print("🔍 DEBUG: No file chunks found in Supabase")
+            print(f"🔍 DEBUG: Found {len(uploaded_files)} uploaded files from Supabase")
+            print(f"🔍 DEBUG: Files: {uploaded_files}")
         except Exception as e:
             print(f"⚠️ Error getting file chunks from Supabase: {e}")
         
@@ -640,33 +641,32 @@ def get_rfp_analysis_data(project_id: str) -> dict:
         
         try:
             # Query file_chunks table for RFP documents in this project
-            chunks_data = supa.query_data("file_chunks")
-            if chunks_data:
-                rfp_content = ""
-                for chunk in chunks_data:
-                    if chunk.get('project_id') == project_id:
-                        file_name = chunk.get('file_name', '').lower()
-                        if 'rfp' in file_name or 'request' in file_name or 'proposal' in file_name:
-                            rfp_content += chunk.get('chunk_text', '') + " "
+            chunks_data = supa.iter_rows(
+                "file_chunks",
+                f"project_id=eq.{project_id}&select=file_name,chunk_text",
+            )
+            rfp_content = ""
+            for chunk in chunks_data:
+                file_name = chunk.get('file_name', '').lower()
+                if 'rfp' in file_name or 'request' in file_name or 'proposal' in file_name:
+                    rfp_content += chunk.get('chunk_text', '') + " "
                 
-                if rfp_content:
-                    # Extract requirements from RFP content
-                    requirements = []
-                    if "non-profit" in rfp_content.lower():
-                        requirements.append("Non-profit status required")
-                    if "community" in rfp_content.lower():
-                        requirements.append("Community focus required")
-                    if "measurable" in rfp_content.lower():
-                        requirements.append("Measurable outcomes required")
-                    if "funding" in rfp_content.lower():
-                        requirements.append("Funding requirements specified")
+            if rfp_content:
+                # Extract requirements from RFP content
+                requirements = []
+                if "non-profit" in rfp_content.lower():
+                    requirements.append("Non-profit status required")
+                if "community" in rfp_content.lower():
+                    requirements.append("Community focus required")
+                if "measurable" in rfp_content.lower():
+                    requirements.append("Measurable outcomes required")
+                if "funding" in rfp_content.lower():
+                    requirements.append("Funding requirements specified")
                     
-                    rfp_requirements = requirements
-                    print(f"🔍 DEBUG: Found RFP content, extracted {len(requirements)} requirements")
-                else:
-                    print("🔍 DEBUG: No RFP documents found in Supabase")
+                rfp_requirements = requirements
+                print(f"🔍 DEBUG: Found RFP content, extracted {len(requirements)} requirements")
             else:
-                print("🔍 DEBUG: No file chunks found in Supabase")
+                print("🔍 DEBUG: No RFP documents found in Supabase")
         except Exception as e:
             print(f"⚠️ Error getting RFP data from Supabase: {e}")
         
@@ -1558,7 +1558,7 @@ async def get_chat_history(project_id: str):
     """Get chat history from database"""
     try:
         # Get saved chat messages from Supabase
-        chat_messages = supa.get_chat_messages(project_id)
+        chat_messages = await supa.aget_chat_messages(project_id)
         
         # Format messages for frontend
         formatted_messages = []
@@ -1846,50 +1846,40 @@ async def debug_rag_status():
     """Debug endpoint to check Supabase RAG system status"""
     try:
         # Test Supabase RAG system
-        chunks_data = supa.query_data("file_chunks")
-        if chunks_data:
-            # Group by file_name to get unique files
-            files_dict = {}
-            for chunk in chunks_data:
-                file_name = chunk.get('file_name', 'Unknown')
-                project_id = chunk.get('project_id', 'Unknown')
+        chunks_data = supa.iter_rows("file_chunks", "select=project_id,file_name,chunk_text")
+        # Group by file_name to get unique files
+        files_dict = {}
+        for chunk in chunks_data:
+            file_name = chunk.get('file_name', 'Unknown')
+            project_id = chunk.get('project_id', 'Unknown')
                 
-                if file_name not in files_dict:
-                    files_dict[file_name] = {
-                        'project_id': project_id,
-                        'chunks': []
-                    }
+            if file_name not in files_dict:
+                files_dict[file_name] = {
+                    'project_id': project_id,
+                    'chunks': []
+                }
                 
-                files_dict[file_name]['chunks'].append(chunk.get('chunk_text', ''))
+            files_dict[file_name]['chunks'].append(chunk.get('chunk_text', ''))
             
-            uploaded_files = list(files_dict.keys())
-            total_chunks = sum(len(files_dict[file]['chunks']) for file in files_dict)
+        uploaded_files = list(files_dict.keys())
+        total_chunks = sum(len(files_dict[file]['chunks']) for file in files_dict)
             
-            return {
-                "status": "success",
-                "rag_system": "supabase_operational",
-                "total_files": len(uploaded_files),
-                "total_chunks": total_chunks,
-                "uploaded_files": uploaded_files,
-                "file_details": [
-                    {
-                        "filename": file_name,
-                        "project_id": file_info['project_id'],
-                        "chunk_count": len(file_info['chunks']),
-                        "total_content_length": sum(len(chunk) for chunk in file_info['chunks'])
-                    }
-                    for file_name, file_info in list(files_dict.items())[:5]  # Show first 5 files
-                ]
-            }
-        else:
-            return {
-                "status": "success",
-                "rag_system": "supabase_operational",
-                "total_files": 0,
-                "total_chunks": 0,
-                "uploaded_files": [],
-                "file_details": []
-            }
+        return {
+            "status": "success",
+            "rag_system": "supabase_operational",
+            "total_files": len(uploaded_files),
+            "total_chunks": total_chunks,
+            "uploaded_files": uploaded_files,
+            "file_details": [
+                {
+                    "filename": file_name,
+                    "project_id": file_info['project_id'],
+                    "chunk_count": len(file_info['chunks']),
+                    "total_content_length": sum(len(chunk) for chunk in file_info['chunks'])
+                }
+                for file_name, file_info in list(files_dict.items())[:5]  # Show first 5 files
+            ]
+        }
     except Exception as e:
         return {
             "status": "error",
@@ -1989,7 +1979,7 @@ async def get_relevant_context(query: str, section_type: str, community_context:
     """Get culturally relevant context using Supabase RAG"""
     try:
         # Use Supabase RAG context
-        context = supa.rag_context(query, [], None)  # Empty files list, no project_id
+        context = await supa.arag_context(query, [], None)  # Empty files list, no project_id
         return {"success": True, "context": context}
     except Exception as e:
         print(f"❌ Error getting relevant context: {e}")
@@ -2025,6 +2015,28 @@ async def generate_culturally_sensitive_content(request: dict):
         print(f"❌ Error generating culturally sensitive content: {e}")
         return {"success": False, "error": str(e)}
 
+@app.post("/cultural/stream")
+async def stream_culturally_sensitive_content(request: dict):
+    """Stream culturally sensitive content as server-sent events"""
+    prompt_type = request.get('prompt_type', 'general')
+    context = request.get('context', {})
+    community_context = request.get('community_context', '')
+    
+    def event_stream():
+        if specialized_llm is None:
+            yield f"data: {json.dumps({'error': 'Specialized LLM not available'})}\n\n"
+            return
+        try:
+            for chunk in specialized_llm.stream_culturally_sensitive_response(prompt_type, context, community_context):
+                yield f"data: {json.dumps({'content': chunk})}\n\n"
+        except Exception as e:
+            # The stream broke part-way; tell the client the content is incomplete
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            return
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.get("/advanced/status")
 async def get_advanced_features_status():
     """Get status of advanced RAG and LLM features"""
@@ -2051,6 +2063,23 @@ async def get_advanced_features_status():
         return {"success": False, "error": str(e)}
 
 # Evaluation Endpoints
+_BATCH_EVALUATORS = ("cognitive", "cultural", "comprehensive")
+
+def _combine_evaluations(response_text: str, cognitive_eval: dict, cultural_eval: dict) -> dict:
+    """Build the comprehensive evaluation from the cognitive and cultural ones"""
+    # Calculate overall quality score
+    overall_score = (cognitive_eval['overall_score'] + cultural_eval['overall_cultural_score']) / 2
+    
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "response_text": response_text[:200] + "..." if len(response_text) > 200 else response_text,
+        "cognitive_evaluation": cognitive_eval,
+        "cultural_evaluation": cultural_eval,
+        "overall_quality_score": overall_score,
+        "quality_level": "excellent" if overall_score >= 80 else "good" if overall_score >= 60 else "needs_improvement",
+        "recommendations": cognitive_eval['recommendations'] + cultural_eval['recommendations']
+    }
+
 @app.post("/evaluate/cognitive")
 async def evaluate_cognitive_friendliness(request: dict):
     """Evaluate cognitive friendliness of AI response"""
@@ -2097,25 +2126,49 @@ async def evaluate_comprehensive_quality(request: dict):
         # Perform both evaluations
         cognitive_eval = cognitive_evaluator.evaluate_response(response_text)
         cultural_eval = cultural_evaluator.evaluate_response(response_text, community_context)
-        
-        # Calculate overall quality score
-        overall_score = (cognitive_eval['overall_score'] + cultural_eval['overall_cultural_score']) / 2
-        
-        comprehensive_eval = {
-            "timestamp": datetime.now().isoformat(),
-            "response_text": response_text[:200] + "..." if len(response_text) > 200 else response_text,
-            "cognitive_evaluation": cognitive_eval,
-            "cultural_evaluation": cultural_eval,
-            "overall_quality_score": overall_score,
-            "quality_level": "excellent" if overall_score >= 80 else "good" if overall_score >= 60 else "needs_improvement",
-            "recommendations": cognitive_eval['recommendations'] + cultural_eval['recommendations']
-        }
+        comprehensive_eval = _combine_evaluations(response_text, cognitive_eval, cultural_eval)
         
         return {"success": True, "evaluation": comprehensive_eval}
     except Exception as e:
         print(f"❌ Error performing comprehensive evaluation: {e}")
         return {"success": False, "error": str(e)}
 
+@app.post("/evaluate/batch")
+async def evaluate_batch(request: dict):
+    """Run several evaluators over one AI response in a single call"""
+    try:
+        response_text = request.get('response_text', '')
+        community_context = request.get('community_context', '')
+        evaluators = request.get('evaluators') or list(_BATCH_EVALUATORS)
+        
+        if not response_text:
+            return {"success": False, "error": "No response text provided"}
+        
+        unknown = [name for name in evaluators if name not in _BATCH_EVALUATORS]
+        if unknown:
+            return {"success": False, "error": f"Unknown evaluators: {', '.join(unknown)}"}
+        
+        # The comprehensive result is built from the other two, so each
+        # evaluator runs at most once however many results are requested
+        cognitive_eval = cultural_eval = None
+        if 'cognitive' in evaluators or 'comprehensive' in evaluators:
+            cognitive_eval = cognitive_evaluator.evaluate_response(response_text)
+        if 'cultural' in evaluators or 'comprehensive' in evaluators:
+            cultural_eval = cultural_evaluator.evaluate_response(response_text, community_context)
+        
+        evaluations = {}
+        if 'cognitive' in evaluators:
+            evaluations['cognitive'] = cognitive_eval
+        if 'cultural' in evaluators:
+            evaluations['cultural'] = cultural_eval
+        if 'comprehensive' in evaluators:
+            evaluations['comprehensive'] = _combine_evaluations(response_text, cognitive_eval, cultural_eval)
+        
+        return {"success": True, "evaluations": evaluations}
+    except Exception as e:
+        print(f"❌ Error performing batch evaluation: {e}")
+        return {"success": False, "error": str(e)}
+
 @app.post("/performance/record")
 async def record_performance_metrics(request: dict):
     """Record performance metrics for monitoring"""
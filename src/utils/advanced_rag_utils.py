@@ -10,6 +10,7 @@ This module implements a sophisticated RAG system that can handle:
 import os
 import json
 import uuid
+import orjson
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
@@ -290,8 +291,9 @@ class AdvancedRAGSystem:
         filename = f"{item.id}.json"
         filepath = os.path.join(self.data_dir, "knowledge", filename)
         
-        with open(filepath, 'w') as f:
-            json.dump(asdict(item), f, indent=2)
+        with open(filepath, 'wb') as f:
+            # orjson serializes the dataclass directly, with no asdict() copy
+            f.write(orjson.dumps(item, option=orjson.OPT_INDENT_2))
     
     def search_knowledge(self, query: str, category: Optional[str] = None, 
                         community_context: Optional[str] = None, limit: int = 5) -> List[CulturalKnowledgeItem]:
@@ -53,6 +53,21 @@ CHUNK_SIZE: int = int(os.getenv("CHUNK_SIZE", "1000"))
 # using a different provider or a self‑hosted model.
 OPENAI_EMBEDDING_MODEL: str = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002")
 
+# Directory for the on-disk cache of OpenAI embeddings used by
+# supabase_utils.create_embeddings.  Entries are keyed by model and text.
+EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR", "~/.cache/ai_grant_embeddings")
+
+# When "true", file chunks also store an int8 copy of their embedding plus a
+# per-vector scale (embedding_int8 / embedding_scale columns, see
+# pgvector/quantized_embeddings.sql), a compact form for export and offline
+# scoring.  The float embedding column is always written because RAG
+# retrieval orders by it.  Defaults to "false".
+QUANTIZE_EMBEDDINGS: bool = os.getenv("QUANTIZE_EMBEDDINGS", "false").lower() == "true"
+
+# Supabase Storage bucket holding the raw bytes of uploaded documents.  Rows
+# in the files table keep only the object path (see pgvector/file_storage.sql).
+SUPABASE_STORAGE_BUCKET: str = os.getenv("SUPABASE_STORAGE_BUCKET", "grant-files")
+
 # Vercel AI Gateway configuration
 AI_GATEWAY_API_KEY: str = os.getenv("AI_GATEWAY_API_KEY", "")
 
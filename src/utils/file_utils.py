@@ -5,12 +5,28 @@ and context management for personalized AI responses.
 """
 
 import os
-import json
 import hashlib
+import threading
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-import PyPDF2
-import docx
+from io import BytesIO
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+import orjson
+
+# Document parsers (optional); plain-text uploads work without them.
+# pypdfium2 is preferred for PDFs: its C extractor is several times faster
+# than PyPDF2's pure-Python one.
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+try:
+    import docx
+except ImportError:
+    docx = None
 from pathlib import Path
 
 # Create uploads directory if it doesn't exist
@@ -25,6 +41,33 @@ CONTEXT_DIR.mkdir(exist_ok=True)
 CHAT_DIR = Path("chat_history")
 CHAT_DIR.mkdir(exist_ok=True)
 
+def _read_json(path: Path) -> Any:
+    """Load a JSON document written by _write_json."""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+def _write_json(path: Path, data: Any) -> None:
+    """Serialize data with orjson and atomically replace path with it.
+
+    The payload is already a single bytes object, so it goes straight to the
+    fd (normally one write syscall) instead of through a userspace buffer.
+    It is written to a temp file first and swapped in with os.replace, so a
+    crash mid-write leaves the previous JSON intact rather than a torn file.
+    """
+    payload = memoryview(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while payload:
+            payload = payload[os.write(fd, payload):]
+    finally:
+        os.close(fd)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
 def save_uploaded_file(file_content: bytes, filename: str, project_id: str) -> Dict[str, Any]:
     """Save an uploaded file and extract its text content.
     
@@ -41,8 +84,9 @@ def save_uploaded_file(file_content: bytes, filename: str, project_id: str) -> D
         project_dir = UPLOADS_DIR / project_id
         project_dir.mkdir(exist_ok=True)
         
-        # Generate unique filename
-        file_hash = hashlib.md5(file_content).hexdigest()
+        # Generate unique filename (SHA-256 is hardware-accelerated via
+        # OpenSSL; truncated to MD5's 32 hex chars to keep names the same size)
+        file_hash = hashlib.sha256(file_content).hexdigest()[:32]
         file_ext = Path(filename).suffix.lower()
         unique_filename = f"{file_hash}{file_ext}"
         file_path = project_dir / unique_filename
@@ -62,6 +106,7 @@ def save_uploaded_file(file_content: bytes, filename: str, project_id: str) -> D
             "project_id": project_id,
             "uploaded_at": datetime.now().isoformat(),
             "extracted_text": extracted_text,
+            "extracted_text_length": len(extracted_text),
             "file_size": len(file_content),
             "file_type": file_ext
         }
@@ -72,7 +117,7 @@ def save_uploaded_file(file_content: bytes, filename: str, project_id: str) -> D
             "success": True,
             "filename": filename,
             "file_hash": file_hash,
-            "extracted_text_length": len(extracted_text),
+            "extracted_text_length": context_data["extracted_text_length"],
             "uploaded_at": context_data["uploaded_at"]
         }
         
@@ -104,26 +149,67 @@ def extract_text_from_file(file_path: Path, file_ext: str) -> str:
         print(f"❌ Error extracting text from {file_path}: {e}")
         return f"Error extracting text: {str(e)}"
 
-def extract_pdf_text(file_path: Path) -> str:
-    """Extract text from PDF file."""
+def extract_text_from_bytes(file_content: bytes, file_ext: str) -> str:
+    """Extract text content from an in-memory upload.
+    
+    BytesIO wraps the bytes without copying them, so uploads are parsed
+    straight from memory instead of round-tripping through a temp file.
+    
+    Args:
+        file_content: The file content as bytes
+        file_ext: File extension
+        
+    Returns:
+        Extracted text content
+    """
+    try:
+        if file_ext == ".pdf":
+            return extract_pdf_text(BytesIO(file_content))
+        elif file_ext in [".docx", ".doc"]:
+            return extract_docx_text(BytesIO(file_content))
+        elif file_ext in [".txt", ".md"]:
+            return file_content.decode("utf-8")
+        else:
+            return f"Unsupported file type: {file_ext}"
+            
+    except Exception as e:
+        print(f"❌ Error extracting text from {file_ext} upload: {e}")
+        return f"Error extracting text: {str(e)}"
+
+def extract_pdf_text(source: Union[Path, BinaryIO]) -> str:
+    """Extract text from a PDF file path or binary stream."""
+    if pdfium is not None:
+        return _extract_pdf_text_pdfium(source)
+    if PyPDF2 is None:
+        return "Error reading PDF: no PDF parser is installed"
+    try:
+        pdf_reader = PyPDF2.PdfReader(source)
+        return "\n".join(page.extract_text() or "" for page in pdf_reader.pages).strip()
+    except Exception as e:
+        return f"Error reading PDF: {str(e)}"
+
+def _extract_pdf_text_pdfium(source: Union[Path, BinaryIO]) -> str:
+    """Extract PDF text with pdfium.
+
+    Pages are read sequentially: pdfium is not thread-safe, so fanning pages
+    out to a thread pool would need a global lock and gain nothing.
+    """
     try:
-        with open(file_path, "rb") as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
+        pdf = pdfium.PdfDocument(source)
+        try:
+            return "\n".join(page.get_textpage().get_text_range() for page in pdf).strip()
+        finally:
+            pdf.close()
     except Exception as e:
         return f"Error reading PDF: {str(e)}"
 
-def extract_docx_text(file_path: Path) -> str:
-    """Extract text from DOCX file."""
+def extract_docx_text(source: Union[Path, BinaryIO]) -> str:
+    """Extract text from a DOCX file path or binary stream."""
+    if docx is None:
+        return "Error reading DOCX: python-docx is not installed"
     try:
-        doc = docx.Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
+        doc = docx.Document(source)
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
     except Exception as e:
         return f"Error reading DOCX: {str(e)}"
 
@@ -150,8 +236,7 @@ def save_context(project_id: str, context_data: Dict[str, Any]) -> bool:
         
         # Load existing context or create new
         if context_file.exists():
-            with open(context_file, "r") as f:
-                context = json.load(f)
+            context = _read_json(context_file)
         else:
             context = {
                 "project_id": project_id,
@@ -167,8 +252,7 @@ def save_context(project_id: str, context_data: Dict[str, Any]) -> bool:
         context["updated_at"] = datetime.now().isoformat()
         
         # Save updated context
-        with open(context_file, "w") as f:
-            json.dump(context, f, indent=2)
+        _write_json(context_file, context)
         
         return True
         
@@ -189,8 +273,7 @@ def get_project_context(project_id: str) -> Dict[str, Any]:
         context_file = CONTEXT_DIR / f"{project_id}_context.json"
         
         if context_file.exists():
-            with open(context_file, "r") as f:
-                return json.load(f)
+            return _read_json(context_file)
         else:
             return {
                 "project_id": project_id,
@@ -227,8 +310,7 @@ def update_project_info(project_id: str, organization_info: str = "", initiative
         context["updated_at"] = datetime.now().isoformat()
         
         context_file = CONTEXT_DIR / f"{project_id}_context.json"
-        with open(context_file, "w") as f:
-            json.dump(context, f, indent=2)
+        _write_json(context_file, context)
         
         return True
         
@@ -263,7 +345,10 @@ def get_context_summary(project_id: str) -> str:
             summary_parts.append("Uploaded Documents:")
             for file_info in context["files"]:
                 filename = file_info.get("filename", "Unknown")
-                text_length = len(file_info.get("extracted_text", ""))
+                # Stored at upload time; entries saved before that fall back to len()
+                text_length = file_info.get("extracted_text_length")
+                if text_length is None:
+                    text_length = len(file_info.get("extracted_text", ""))
                 summary_parts.append(f"- {filename} ({text_length} characters)")
         
         return "\n\n".join(summary_parts) if summary_parts else "No context available."
@@ -315,8 +400,7 @@ def save_chat_message(project_id: str, conversation_data: Dict[str, Any]) -> boo
         
         # Load existing chat history or create new
         if chat_file.exists():
-            with open(chat_file, "r") as f:
-                chat_history = json.load(f)
+            chat_history = _read_json(chat_file)
         else:
             chat_history = {
                 "project_id": project_id,
@@ -334,8 +418,7 @@ def save_chat_message(project_id: str, conversation_data: Dict[str, Any]) -> boo
             chat_history["messages"] = chat_history["messages"][-50:]
         
         # Save updated chat history
-        with open(chat_file, "w") as f:
-            json.dump(chat_history, f, indent=2)
+        _write_json(chat_file, chat_history)
         
         return True
         
@@ -356,8 +439,7 @@ def get_chat_history(project_id: str) -> str:
         chat_file = CHAT_DIR / f"{project_id}_chat.json"
         
         if chat_file.exists():
-            with open(chat_file, "r") as f:
-                chat_history = json.load(f)
+            chat_history = _read_json(chat_file)
             
             # Format recent messages for context
             recent_messages = chat_history.get("messages", [])[-10:]  # Last 10 messages
@@ -390,8 +472,7 @@ def get_chat_messages(project_id: str) -> List[Dict[str, Any]]:
         chat_file = CHAT_DIR / f"{project_id}_chat.json"
         
         if chat_file.exists():
-            with open(chat_file, "r") as f:
-                chat_history = json.load(f)
+            chat_history = _read_json(chat_file)
             return chat_history.get("messages", [])
         else:
             return []
@@ -5,48 +5,32 @@ grant writing assistance with cultural sensitivity and cognitive friendliness.
 """
 
 import os
-from openai import OpenAI
-from typing import Dict, List, Optional
+import json
+from openai import OpenAI, AsyncOpenAI
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
-# Configure OpenAI client (with fallback)
+# Configure OpenAI clients (with fallback)
 try:
     api_key = os.getenv("OPENAI_API_KEY")
     if api_key:
         client = OpenAI(api_key=api_key)
+        async_client = AsyncOpenAI(api_key=api_key)
         print(f"🔧 OpenAI API key status: configured ({len(api_key)} characters)")
     else:
         client = None
+        async_client = None
         print("⚠️ Warning: OPENAI_API_KEY not found in environment variables")
         print("⚠️ AI responses will be limited. Please set OPENAI_API_KEY for full functionality.")
 except Exception as e:
     client = None
+    async_client = None
     print(f"⚠️ Error initializing OpenAI client: {e}")
 
-def get_culturally_sensitive_response(prompt: str, community_context: str = "", max_tokens: int = 1000) -> str:
-    """Get a culturally sensitive response from OpenAI's GPT model.
-    
-    Args:
-        prompt: The user's question or prompt
-        community_context: Optional community/cultural context
-        max_tokens: Maximum tokens for the response
-        
-    Returns:
-        The AI-generated response with cultural sensitivity
-    """
-    # Check if OpenAI client is available
-    if client is None:
-        return "⚠️ OpenAI API key not configured. Please set the OPENAI_API_KEY environment variable to enable AI responses."
-    
-    # Check if OpenAI API key is configured (recheck at runtime)
-    current_api_key = os.getenv("OPENAI_API_KEY")
-    if not current_api_key:
-        print("🔧 Runtime check: OPENAI_API_KEY not found in environment")
-        return "⚠️ OpenAI API key not configured. Please set the OPENAI_API_KEY environment variable to enable AI responses."
-    
-    try:
-        # Specialized system message for cultural competency and cognitive friendliness
-        system_message = """You are a culturally sensitive grant writing assistant with expertise in community-based organizations. 
+API_KEY_MISSING_MESSAGE = "⚠️ OpenAI API key not configured. Please set the OPENAI_API_KEY environment variable to enable AI responses."
+
+# Specialized system message for cultural competency and cognitive friendliness
+CULTURAL_SYSTEM_MESSAGE = """You are a culturally sensitive grant writing assistant with expertise in community-based organizations. 
 
 CULTURAL COMPETENCY GUIDELINES:
 - Use inclusive, respectful language that honors diverse communities
@@ -71,21 +55,131 @@ RESPONSE FORMAT:
 - End with clear next steps or follow-up questions
 - Keep language simple and accessible"""
 
-        messages = []
-        messages.append({"role": "system", "content": system_message})
+def _build_cultural_messages(prompt: str, community_context: str = "",
+                             system_message: Optional[str] = None) -> List[Dict[str, str]]:
+    """Assemble the chat messages for a culturally sensitive request.
+    
+    The system message is passed through verbatim and everything that varies
+    per request goes into the user message, so the prompt prefix stays
+    byte-identical across calls and the provider's prompt cache can reuse it.
+    """
+    if community_context:
+        prompt = f"Community Context: {community_context}. Consider this cultural and community context in your response.\n\n{prompt}"
+    
+    return [
+        {"role": "system", "content": system_message or CULTURAL_SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+
+def _format_api_error(e: Exception) -> str:
+    """Translate an OpenAI exception into a user-facing message."""
+    print(f"❌ OpenAI API error: {e}")
+    if "authentication" in str(e).lower() or "api key" in str(e).lower():
+        return "⚠️ OpenAI API key is invalid or not configured. Please check your OPENAI_API_KEY environment variable."
+    elif "quota" in str(e).lower() or "billing" in str(e).lower():
+        return "⚠️ OpenAI API quota exceeded or billing issue. Please check your OpenAI account."
+    else:
+        return f"⚠️ OpenAI API error: {str(e)}"
+
+class OpenAIStreamError(Exception):
+    """A streamed completion failed after some content was already yielded.
+    
+    The message is the user-facing error text from _format_api_error.
+    """
+
+def stream_culturally_sensitive_response(prompt: str, community_context: str = "", max_tokens: int = 1000,
+                                         system_message: Optional[str] = None) -> Iterator[str]:
+    """Stream a culturally sensitive response from OpenAI's GPT model.
+    
+    Yields content deltas as they arrive so callers can render the first
+    tokens long before a full grant section has been generated.
+    
+    Args:
+        prompt: The user's question or prompt
+        community_context: Optional community/cultural context
+        max_tokens: Maximum tokens for the response
+        system_message: Optional static system prompt replacing the default
         
-        # Add community context if provided
-        if community_context:
-            messages.append({
-                "role": "system", 
-                "content": f"Community Context: {community_context}. Consider this cultural and community context in your response."
-            })
-            
-        messages.append({"role": "user", "content": prompt})
+    Yields:
+        Fragments of the AI-generated response
+    
+    Raises:
+        OpenAIStreamError: If the stream fails part-way through, so callers
+            can tell a truncated response from a complete one
+    """
+    # Check if OpenAI client is available
+    if client is None:
+        yield API_KEY_MISSING_MESSAGE
+        return
+    
+    # Check if OpenAI API key is configured (recheck at runtime)
+    current_api_key = os.getenv("OPENAI_API_KEY")
+    if not current_api_key:
+        print("🔧 Runtime check: OPENAI_API_KEY not found in environment")
+        yield API_KEY_MISSING_MESSAGE
+        return
+    
+    started = False
+    try:
+        stream = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=_build_cultural_messages(prompt, community_context, system_message),
+            max_tokens=max_tokens,
+            temperature=0.7,
+            stream=True
+        )
         
-        response = client.chat.completions.create(
+        for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    started = True
+                    yield delta
+        
+    except Exception as e:
+        if started:
+            raise OpenAIStreamError(_format_api_error(e)) from e
+        yield _format_api_error(e)
+
+def get_culturally_sensitive_response(prompt: str, community_context: str = "", max_tokens: int = 1000,
+                                      system_message: Optional[str] = None) -> str:
+    """Get a culturally sensitive response from OpenAI's GPT model.
+    
+    Args:
+        prompt: The user's question or prompt
+        community_context: Optional community/cultural context
+        max_tokens: Maximum tokens for the response
+        system_message: Optional static system prompt replacing the default
+        
+    Returns:
+        The AI-generated response with cultural sensitivity
+    """
+    try:
+        return "".join(
+            stream_culturally_sensitive_response(prompt, community_context, max_tokens, system_message)
+        ).strip()
+    except OpenAIStreamError as e:
+        # A truncated response is not a usable answer; report the error alone
+        return str(e)
+
+async def aget_culturally_sensitive_response(prompt: str, community_context: str = "", max_tokens: int = 1000,
+                                             system_message: Optional[str] = None) -> str:
+    """Async variant of get_culturally_sensitive_response.
+    
+    Uses the AsyncOpenAI client so several sections can be generated
+    concurrently on one event loop.
+    """
+    if async_client is None:
+        return API_KEY_MISSING_MESSAGE
+    
+    if not os.getenv("OPENAI_API_KEY"):
+        print("🔧 Runtime check: OPENAI_API_KEY not found in environment")
+        return API_KEY_MISSING_MESSAGE
+    
+    try:
+        response = await async_client.chat.completions.create(
             model="gpt-3.5-turbo",
-            messages=messages,
+            messages=_build_cultural_messages(prompt, community_context, system_message),
             max_tokens=max_tokens,
             temperature=0.7
         )
@@ -93,13 +187,108 @@ RESPONSE FORMAT:
         return response.choices[0].message.content.strip()
         
     except Exception as e:
-        print(f"❌ OpenAI API error: {e}")
-        if "authentication" in str(e).lower() or "api key" in str(e).lower():
-            return "⚠️ OpenAI API key is invalid or not configured. Please check your OPENAI_API_KEY environment variable."
-        elif "quota" in str(e).lower() or "billing" in str(e).lower():
-            return "⚠️ OpenAI API quota exceeded or billing issue. Please check your OpenAI account."
-        else:
-            return f"⚠️ OpenAI API error: {str(e)}"
+        return _format_api_error(e)
+
+def submit_chat_batch(requests: List[Tuple[str, List[Dict[str, str]]]], max_tokens: int = 1000) -> str:
+    """Submit chat completions to the OpenAI Batch API.
+    
+    Batches are billed at a discount and bypass per-minute rate limits but
+    may take up to 24 hours, so this is meant for offline bulk drafting.
+    
+    Args:
+        requests: (custom_id, messages) pairs, one per completion
+        max_tokens: Maximum tokens for each response
+        
+    Returns:
+        The ID of the created batch
+    """
+    if client is None:
+        raise RuntimeError(API_KEY_MISSING_MESSAGE)
+    
+    lines = [
+        json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": "gpt-3.5-turbo",
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "temperature": 0.7
+            }
+        })
+        for custom_id, messages in requests
+    ]
+    
+    batch_file = client.files.create(
+        file=("grant_batch.jsonl", "\n".join(lines).encode("utf-8")),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    return batch.id
+
+# Batch statuses after which no more output will be produced
+_BATCH_FAILED_STATUSES = frozenset({"failed", "expired", "cancelled"})
+
+class ChatBatchError(RuntimeError):
+    """A chat batch ended without completing.
+    
+    ``status`` is the batch's terminal status and ``results`` holds whatever
+    requests finished before it stopped, in the same form as
+    get_chat_batch_results.
+    """
+    
+    def __init__(self, batch_id: str, status: str, results: Dict[str, Optional[str]]):
+        super().__init__(f"Batch {batch_id} {status} with {len(results)} result(s)")
+        self.status = status
+        self.results = results
+
+def _read_batch_file(file_id: Optional[str], results: Dict[str, Optional[str]]) -> None:
+    """Add a batch output or error file's records to results."""
+    if not file_id:
+        return
+    for line in client.files.content(file_id).text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        body = (record.get("response") or {}).get("body") or {}
+        choices = body.get("choices") or []
+        results[record["custom_id"]] = choices[0]["message"]["content"].strip() if choices else None
+
+def get_chat_batch_results(batch_id: str) -> Optional[Dict[str, Optional[str]]]:
+    """Fetch the results of a batch submitted with submit_chat_batch.
+    
+    Args:
+        batch_id: ID returned by submit_chat_batch
+        
+    Returns:
+        Mapping of custom_id to response text (None for failed requests),
+        or None while the batch is still running
+        
+    Raises:
+        ChatBatchError: If the batch failed, expired or was cancelled; its
+            ``results`` carry any requests that finished first
+    """
+    if client is None:
+        raise RuntimeError(API_KEY_MISSING_MESSAGE)
+    
+    batch = client.batches.retrieve(batch_id)
+    if batch.status != "completed" and batch.status not in _BATCH_FAILED_STATUSES:
+        return None
+    
+    # Requests that errored are listed in the error file; read it first so a
+    # real response for the same id takes precedence
+    results: Dict[str, Optional[str]] = {}
+    _read_batch_file(batch.error_file_id, results)
+    _read_batch_file(batch.output_file_id, results)
+    
+    if batch.status in _BATCH_FAILED_STATUSES:
+        raise ChatBatchError(batch_id, batch.status, results)
+    return results
 
 def get_openai_response(prompt: str, system_message: str = None, max_tokens: int = 1000) -> str:
     """Get a response from OpenAI's GPT model.
@@ -5,24 +5,285 @@ with cultural competency features and advanced prompt engineering.
 """
 
 import os
+import sys
 import json
-from typing import Dict, List, Optional, Any
+import time
+import asyncio
+import hashlib
+import functools
+import importlib.util
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime
 import re
+import string
 
-# Import the advanced RAG system (optional)
+import orjson
+from cachetools import TTLCache
+
+# Local sentence encoder for the semantic response cache (optional).  Only
+# probed here; sentence_transformers pulls in torch, so it is imported the
+# first time the cache actually encodes a prompt.
 try:
-    from .advanced_rag_utils import advanced_rag_db, CulturalKnowledgeItem
-    ADVANCED_RAG_AVAILABLE = True
+    import numpy as np
+    SEMANTIC_CACHE_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
 except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+@functools.lru_cache(maxsize=None)
+def _load_advanced_rag():
+    """Import the advanced RAG system on first use (optional).
+
+    Deferred so importing this module, e.g. for analyze_cultural_alignment,
+    does not pay for the vector store and OpenAI client start-up.
+    """
     try:
-        from advanced_rag_utils import advanced_rag_db, CulturalKnowledgeItem
-        ADVANCED_RAG_AVAILABLE = True
+        from .advanced_rag_utils import advanced_rag_db
     except ImportError:
-        print("⚠️ Advanced RAG not available for specialized LLM")
-        ADVANCED_RAG_AVAILABLE = False
-        advanced_rag_db = None
-        CulturalKnowledgeItem = None
+        try:
+            from advanced_rag_utils import advanced_rag_db
+        except ImportError:
+            print("⚠️ Advanced RAG not available for specialized LLM")
+            return None
+    return advanced_rag_db
+
+# Sections generated for a full proposal, in document order
+PROPOSAL_SECTIONS = (
+    "executive_summary",
+    "organization_profile",
+    "project_description",
+    "budget_section",
+    "timeline_section",
+    "evaluation_section",
+)
+
+# Phrases signalling cultural competency in an organization description,
+# case-folded once so matching is Unicode-aware for multilingual text
+CULTURAL_INDICATORS = tuple(indicator.casefold() for indicator in (
+    "diverse", "inclusive", "community", "cultural", "multicultural",
+    "partnership", "collaboration", "respect", "traditional", "heritage"
+))
+
+# Community-specific recommendations for analyze_cultural_alignment; add a
+# community here rather than branching in code
+_RECOMMENDATIONS: Dict[str, Tuple[str, ...]] = {
+    "urban_communities": (
+        "Emphasize diversity and inclusion in all sections",
+        "Include multiple cultural perspectives and languages",
+        "Address systemic barriers and inequities",
+        "Show commitment to accessibility and representation"
+    ),
+    "rural_communities": (
+        "Highlight local expertise and traditional knowledge",
+        "Show respect for community traditions and practices",
+        "Address geographic and resource barriers",
+        "Emphasize community ownership and sustainability"
+    ),
+    "indigenous_communities": (
+        "Respect traditional knowledge and cultural practices",
+        "Include cultural protocols and community consultation",
+        "Address historical trauma and systemic barriers",
+        "Support community sovereignty and self-determination"
+    ),
+}
+
+# Response returned when generation fails; parsed once at import because the
+# fallback path runs hot during OpenAI outages and retry storms
+_FALLBACK_TEMPLATE = string.Template("""📋 **$title**
+
+Based on your organization's information and community context, here's a culturally sensitive approach:
+
+**Community Focus:**
+Your project serves $community with respect for cultural values and traditions.
+
+**Key Considerations:**
+• Use inclusive, respectful language throughout
+• Highlight community strengths and resilience
+• Address cultural barriers and solutions
+• Include community voice and perspectives
+• Show cultural competency and sensitivity
+
+**Next Steps:**
+Please review this approach and let me know if you'd like me to adjust the focus, tone, or add specific cultural considerations for your community.""")
+
+# Cultural guidelines are cached per community for a few minutes, so
+# knowledge-base updates show up without a restart.  Concurrent misses for a
+# community wait on one in-flight RAG query (single-flight); the in-flight
+# entry is removed once it resolves, so it never outgrows the live requests.
+_GUIDELINES_TTL = 300
+_guidelines_cache: "TTLCache[Optional[str], tuple]" = TTLCache(maxsize=256, ttl=_GUIDELINES_TTL)
+_guidelines_inflight: Dict[Optional[str], Future] = {}
+_guidelines_lock = threading.Lock()
+
+def _fetch_guidelines(community_context: Optional[str]) -> tuple:
+    advanced_rag_db = _load_advanced_rag()
+    if advanced_rag_db is None:
+        raise RuntimeError("Advanced RAG not available")
+    return tuple(advanced_rag_db.get_cultural_guidelines(community_context))
+
+def _get_guidelines_cached(community_context: Optional[str]) -> tuple:
+    """Return cultural guidelines for a community, sharing concurrent RAG queries"""
+    with _guidelines_lock:
+        cached = _guidelines_cache.get(community_context)
+        if cached is not None:
+            return cached
+        future = _guidelines_inflight.get(community_context)
+        leader = future is None
+        if leader:
+            future = _guidelines_inflight[community_context] = Future()
+    if not leader:
+        return future.result()
+    
+    try:
+        guidelines = _fetch_guidelines(community_context)
+    except BaseException as e:
+        with _guidelines_lock:
+            _guidelines_inflight.pop(community_context, None)
+        future.set_exception(e)
+        raise
+    with _guidelines_lock:
+        _guidelines_cache[community_context] = guidelines
+        _guidelines_inflight.pop(community_context, None)
+    future.set_result(guidelines)
+    return guidelines
+
+@functools.lru_cache(maxsize=64)
+def _section_title(prompt_type: str) -> str:
+    return prompt_type.replace('_', ' ').title()
+
+# Context fields identifying whose proposal is being written.  The semantic
+# tier only matches prompts with identical values here, so a near-duplicate
+# prompt for another organization or project never reuses its response.
+_IDENTITY_FIELDS = ("organization_info", "project_context", "context")
+
+class ResponseCache:
+    """Two-tier response cache: exact input match, then semantic near-match.
+
+    Entries expire after ``ttl`` seconds and the least recently used entry is
+    evicted once ``maxsize`` is reached.  The semantic tier embeds the
+    formatted user prompt with a small local encoder and returns a cached
+    response when cosine similarity reaches ``similarity_threshold`` within
+    the same scope; it is skipped entirely when sentence-transformers is not
+    installed.  Methods are safe to call from several threads.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600,
+                 similarity_threshold: float = 0.95,
+                 encoder_name: str = "all-MiniLM-L6-v2"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.encoder_name = encoder_name
+        self.semantic_enabled = SEMANTIC_CACHE_AVAILABLE
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._encoder = None
+        self._encoder_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(prompt_type: str, context: Dict[str, Any],
+                 community_context: Optional[str] = None) -> str:
+        """Hash the normalized generation inputs into an exact-match key"""
+        payload = orjson.dumps(
+            (prompt_type, sorted(context.items()), community_context),
+            default=str,
+        )
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    @staticmethod
+    def make_scope(prompt_type: str, context: Dict[str, Any],
+                   community_context: Optional[str] = None) -> Tuple[str, Optional[str], str]:
+        """Scope for semantic lookups: prompt type, community and requester identity"""
+        identity = orjson.dumps(
+            [context.get(field) for field in _IDENTITY_FIELDS], default=str
+        )
+        return (prompt_type, community_context,
+                hashlib.blake2b(identity, digest_size=16).hexdigest())
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for an exact key, if still fresh"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry["stored_at"] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry["response"]
+
+    def get_similar(self, text: str, scope: Any, vector=None) -> Optional[str]:
+        """Return the best cached response for a near-duplicate prompt
+
+        ``vector`` is the prompt's embedding when the caller already has it.
+        """
+        if not self.semantic_enabled or not self._entries:
+            return None
+        if vector is None:
+            vector = self.encode(text)
+        if vector is None:
+            return None
+
+        with self._lock:
+            now = time.monotonic()
+            keys, vectors = [], []
+            for key, entry in list(self._entries.items()):
+                if now - entry["stored_at"] > self.ttl:
+                    del self._entries[key]
+                elif entry["vector"] is not None and entry["scope"] == scope:
+                    keys.append(key)
+                    vectors.append(entry["vector"])
+            if not vectors:
+                return None
+
+            similarities = np.stack(vectors) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            self._entries.move_to_end(keys[best])
+            return self._entries[keys[best]]["response"]
+
+    def put(self, key: str, response: str, text: Optional[str] = None,
+            scope: Any = None, vector=None) -> None:
+        """Store a response, optionally indexing its prompt for semantic lookup"""
+        if vector is None and text is not None:
+            vector = self.encode(text)
+        with self._lock:
+            self._entries[key] = {
+                "response": response,
+                "vector": vector,
+                "scope": scope,
+                "stored_at": time.monotonic(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+
+    def encode(self, text: str):
+        """Embed text as a unit vector, loading the encoder on first use
+
+        This is CPU-bound; async callers should run it in a worker thread.
+        """
+        if not self.semantic_enabled:
+            return None
+        try:
+            if self._encoder is None:
+                with self._encoder_lock:
+                    if self._encoder is None:
+                        from sentence_transformers import SentenceTransformer
+                        self._encoder = SentenceTransformer(self.encoder_name)
+            return self._encoder.encode(text, normalize_embeddings=True).astype(np.float32)
+        except Exception as e:
+            print(f"⚠️ Semantic response cache disabled: {e}")
+            self.semantic_enabled = False
+            return None
 
 class SpecializedLLMApproach:
     """Specialized 7B-like approach with cultural competency"""
@@ -31,6 +292,7 @@ class SpecializedLLMApproach:
         self.cultural_prompts = self._load_cultural_prompts()
         self.grant_writing_prompts = self._load_grant_writing_prompts()
         self.community_contexts = self._load_community_contexts()
+        self.response_cache = ResponseCache()
     
     def _load_cultural_prompts(self) -> Dict[str, Any]:
         """Load culturally sensitive prompt templates"""
@@ -218,7 +480,7 @@ Include culturally appropriate evaluation methods:
     
     def _load_community_contexts(self) -> Dict[str, Any]:
         """Load community-specific cultural contexts"""
-        return {
+        contexts = {
             "urban_communities": {
                 "cultural_values": ["diversity", "resilience", "community", "innovation"],
                 "communication_style": "direct and inclusive",
@@ -253,12 +515,47 @@ Include culturally appropriate evaluation methods:
                 ]
             }
         }
+        
+        # Intern the shared vocabulary so downstream equality and membership
+        # checks compare by identity and each phrase is stored once
+        for community_info in contexts.values():
+            for field in ("cultural_values", "success_metrics", "cultural_considerations"):
+                community_info[field] = [sys.intern(value) for value in community_info[field]]
+            community_info["communication_style"] = sys.intern(community_info["communication_style"])
+        
+        return contexts
     
     def generate_culturally_sensitive_response(self, prompt_type: str, context: Dict[str, Any], 
                                             community_context: Optional[str] = None) -> str:
         """Generate culturally sensitive response using specialized approach"""
+        from .openai_utils import OpenAIStreamError
+        try:
+            return "".join(
+                self.stream_culturally_sensitive_response(prompt_type, context, community_context)
+            ).strip()
+        except OpenAIStreamError as e:
+            # A truncated section is not a usable answer; report the error alone
+            return str(e)
+    
+    def stream_culturally_sensitive_response(self, prompt_type: str, context: Dict[str, Any],
+                                             community_context: Optional[str] = None) -> Iterator[str]:
+        """Stream a culturally sensitive response as it is generated.
+        
+        Cached responses and non-templated prompt types are yielded whole;
+        templated sections stream token deltas from OpenAI and are cached
+        once the full response has arrived.  If the OpenAI stream fails
+        part-way, OpenAIStreamError propagates and nothing is cached.
+        """
+        from .openai_utils import OpenAIStreamError
         
         try:
+            # Exact-match cache: identical inputs never hit the API twice
+            cache_key = self.response_cache.make_key(prompt_type, context, community_context)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+            
             # Get cultural prompts for the specific type
             if prompt_type in self.cultural_prompts:
                 system_prompt = self.cultural_prompts[prompt_type]["system_prompt"]
@@ -270,23 +567,138 @@ Include culturally appropriate evaluation methods:
                 # Format user prompt
                 user_prompt = user_prompt_template.format(**enhanced_context)
                 
-                # Use OpenAI with specialized prompts
-                from .openai_utils import get_culturally_sensitive_response
-                return get_culturally_sensitive_response(user_prompt, community_context)
+                # Semantic cache: reuse the response to a near-identical prompt
+                # for the same organization and project
+                scope = self.response_cache.make_scope(prompt_type, context, community_context)
+                vector = self.response_cache.encode(user_prompt)
+                cached = self.response_cache.get_similar(user_prompt, scope, vector)
+                if cached is not None:
+                    yield cached
+                    return
+                
+                # Use OpenAI with specialized prompts; a mid-stream failure
+                # raises before the response reaches the cache
+                from .openai_utils import stream_culturally_sensitive_response
+                parts = []
+                for part in stream_culturally_sensitive_response(
+                    user_prompt, community_context, system_message=system_prompt
+                ):
+                    parts.append(part)
+                    yield part
+                
+                response = "".join(parts).strip()
+                if not response.startswith("⚠️"):
+                    self.response_cache.put(cache_key, response, user_prompt, scope, vector)
             
             else:
                 # Fallback to general culturally sensitive response
                 from .openai_utils import chat_grant_assistant
-                return chat_grant_assistant(
+                response = chat_grant_assistant(
+                    f"Help with {prompt_type}",
+                    str(context),
+                    community_context
+                )
+                if not response.startswith("Sorry, I encountered an error"):
+                    self.response_cache.put(cache_key, response)
+                yield response
+                
+        except OpenAIStreamError:
+            raise
+        except Exception as e:
+            print(f"Error generating culturally sensitive response: {e}")
+            yield self._generate_fallback_response(prompt_type, context, community_context)
+    
+    async def agenerate_culturally_sensitive_response(self, prompt_type: str, context: Dict[str, Any],
+                                                    community_context: Optional[str] = None) -> str:
+        """Async variant of generate_culturally_sensitive_response"""
+        
+        try:
+            cache_key = self.response_cache.make_key(prompt_type, context, community_context)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            if prompt_type in self.cultural_prompts:
+                system_prompt = self.cultural_prompts[prompt_type]["system_prompt"]
+                user_prompt_template = self.cultural_prompts[prompt_type]["user_prompt_template"]
+                
+                # RAG lookups are blocking; keep them off the event loop
+                enhanced_context = await asyncio.to_thread(
+                    self._enhance_context_with_cultural_info, context, community_context
+                )
+                user_prompt = user_prompt_template.format(**enhanced_context)
+                
+                # Encoding is CPU-bound, so it runs off the event loop
+                scope = self.response_cache.make_scope(prompt_type, context, community_context)
+                vector = await asyncio.to_thread(self.response_cache.encode, user_prompt)
+                cached = self.response_cache.get_similar(user_prompt, scope, vector)
+                if cached is not None:
+                    return cached
+                
+                from .openai_utils import aget_culturally_sensitive_response
+                response = await aget_culturally_sensitive_response(
+                    user_prompt, community_context, system_message=system_prompt
+                )
+                if not response.startswith("⚠️"):
+                    self.response_cache.put(cache_key, response, user_prompt, scope, vector)
+                return response
+            
+            else:
+                from .openai_utils import chat_grant_assistant
+                response = await asyncio.to_thread(
+                    chat_grant_assistant,
                     f"Help with {prompt_type}",
                     str(context),
                     community_context
                 )
+                if not response.startswith("Sorry, I encountered an error"):
+                    self.response_cache.put(cache_key, response)
+                return response
                 
         except Exception as e:
             print(f"Error generating culturally sensitive response: {e}")
             return self._generate_fallback_response(prompt_type, context, community_context)
     
+    def batch_generate(self, requests: List[Tuple[str, Dict[str, Any], Optional[str]]]) -> str:
+        """Submit many generations to the OpenAI Batch API.
+        
+        Intended for non-interactive workloads such as drafting sections for
+        many organizations at once.  Each request is a
+        ``(prompt_type, context, community_context)`` tuple; results are keyed
+        by ``"<index>-<prompt_type>"``.
+        
+        Returns:
+            The batch ID to pass to get_batch_results
+        """
+        from .openai_utils import _build_cultural_messages, submit_chat_batch
+        
+        batch_requests = []
+        for index, (prompt_type, context, community_context) in enumerate(requests):
+            system_prompt = None
+            if prompt_type in self.cultural_prompts:
+                system_prompt = self.cultural_prompts[prompt_type]["system_prompt"]
+                user_prompt_template = self.cultural_prompts[prompt_type]["user_prompt_template"]
+                enhanced_context = self._enhance_context_with_cultural_info(context, community_context)
+                user_prompt = user_prompt_template.format(**enhanced_context)
+            else:
+                user_prompt = f"Help with {prompt_type}\n\nProject Context: {context}"
+            
+            batch_requests.append((
+                f"{index}-{prompt_type}",
+                _build_cultural_messages(user_prompt, community_context or "", system_prompt)
+            ))
+        
+        return submit_chat_batch(batch_requests)
+    
+    def get_batch_results(self, batch_id: str) -> Optional[Dict[str, Optional[str]]]:
+        """Return results of a batch_generate call, or None if still running
+        
+        Raises openai_utils.ChatBatchError if the batch failed, expired or
+        was cancelled.
+        """
+        from .openai_utils import get_chat_batch_results
+        return get_chat_batch_results(batch_id)
+    
     def _enhance_context_with_cultural_info(self, context: Dict[str, Any], 
                                           community_context: Optional[str] = None) -> Dict[str, Any]:
         """Enhance context with cultural information"""
@@ -301,7 +713,7 @@ Include culturally appropriate evaluation methods:
         
         # Add cultural guidelines from RAG system
         try:
-            cultural_guidelines = advanced_rag_db.get_cultural_guidelines(community_context)
+            cultural_guidelines = _get_guidelines_cached(community_context)
             if cultural_guidelines:
                 enhanced_context["cultural_guidelines"] = "\n".join(cultural_guidelines[0].guidelines[:5])
         except Exception as e:
@@ -313,25 +725,10 @@ Include culturally appropriate evaluation methods:
     def _generate_fallback_response(self, prompt_type: str, context: Dict[str, Any], 
                                   community_context: Optional[str] = None) -> str:
         """Generate fallback response when specialized approach fails"""
-        
-        base_response = f"""📋 **{prompt_type.replace('_', ' ').title()}**
-
-Based on your organization's information and community context, here's a culturally sensitive approach:
-
-**Community Focus:**
-Your project serves {community_context or 'diverse communities'} with respect for cultural values and traditions.
-
-**Key Considerations:**
-• Use inclusive, respectful language throughout
-• Highlight community strengths and resilience
-• Address cultural barriers and solutions
-• Include community voice and perspectives
-• Show cultural competency and sensitivity
-
-**Next Steps:**
-Please review this approach and let me know if you'd like me to adjust the focus, tone, or add specific cultural considerations for your community."""
-        
-        return base_response
+        return _FALLBACK_TEMPLATE.substitute(
+            title=_section_title(prompt_type),
+            community=community_context or 'diverse communities'
+        )
     
     def generate_grant_section_with_cultural_context(self, section_type: str, 
                                                    organization_info: str,
@@ -351,6 +748,44 @@ Please review this approach and let me know if you'd like me to adjust the focus
         # Generate culturally sensitive response
         return self.generate_culturally_sensitive_response(section_type, context, community_context)
     
+    async def agenerate_grant_section_with_cultural_context(self, section_type: str,
+                                                          organization_info: str,
+                                                          project_context: str,
+                                                          community_context: Optional[str] = None) -> str:
+        """Async variant of generate_grant_section_with_cultural_context"""
+        
+        context = {
+            "organization_info": organization_info,
+            "project_context": project_context,
+            "community_focus": community_context or "diverse communities",
+            "uploaded_files": "Based on uploaded documents",
+            "rfp_requirements": "Based on RFP analysis"
+        }
+        
+        return await self.agenerate_culturally_sensitive_response(section_type, context, community_context)
+    
+    async def agenerate_full_proposal(self, organization_info: str, project_context: str,
+                                      community_context: Optional[str] = None) -> Dict[str, str]:
+        """Generate every proposal section concurrently.
+        
+        Section requests are network-bound, so total latency is roughly that of
+        the slowest section rather than the sum of all of them.
+        """
+        sections = await asyncio.gather(*(
+            self.agenerate_grant_section_with_cultural_context(
+                section_type, organization_info, project_context, community_context
+            )
+            for section_type in PROPOSAL_SECTIONS
+        ))
+        return dict(zip(PROPOSAL_SECTIONS, sections))
+    
+    def generate_full_proposal(self, organization_info: str, project_context: str,
+                               community_context: Optional[str] = None) -> Dict[str, str]:
+        """Blocking wrapper around agenerate_full_proposal for sync callers"""
+        return asyncio.run(
+            self.agenerate_full_proposal(organization_info, project_context, community_context)
+        )
+    
     def analyze_cultural_alignment(self, organization_info: str, 
                                  community_context: Optional[str] = None) -> Dict[str, Any]:
         """Analyze cultural alignment of organization with community context"""
@@ -372,38 +807,13 @@ Please review this approach and let me know if you'd like me to adjust the focus
             }
             
             # Check for cultural competency indicators
-            cultural_indicators = [
-                "diverse", "inclusive", "community", "cultural", "multicultural",
-                "partnership", "collaboration", "respect", "traditional", "heritage"
-            ]
-            
-            for indicator in cultural_indicators:
-                if indicator.lower() in organization_info.lower():
+            haystack = organization_info.casefold()
+            for indicator in CULTURAL_INDICATORS:
+                if indicator in haystack:
                     alignment_analysis["cultural_competency_indicators"].append(indicator)
             
             # Generate recommendations
-            if community_context:
-                if community_context == "urban_communities":
-                    alignment_analysis["recommendations"].extend([
-                        "Emphasize diversity and inclusion in all sections",
-                        "Include multiple cultural perspectives and languages",
-                        "Address systemic barriers and inequities",
-                        "Show commitment to accessibility and representation"
-                    ])
-                elif community_context == "rural_communities":
-                    alignment_analysis["recommendations"].extend([
-                        "Highlight local expertise and traditional knowledge",
-                        "Show respect for community traditions and practices",
-                        "Address geographic and resource barriers",
-                        "Emphasize community ownership and sustainability"
-                    ])
-                elif community_context == "indigenous_communities":
-                    alignment_analysis["recommendations"].extend([
-                        "Respect traditional knowledge and cultural practices",
-                        "Include cultural protocols and community consultation",
-                        "Address historical trauma and systemic barriers",
-                        "Support community sovereignty and self-determination"
-                    ])
+            alignment_analysis["recommendations"].extend(_RECOMMENDATIONS.get(community_context, ()))
             
             return alignment_analysis
             
@@ -1,18 +1,33 @@
 """Data models for the AI Grant Writer tool.
 
 This module provides dataclass models for the application entities.
-All database operations are now handled directly by supabase_utils.py.
+Models declare __slots__ (spelled out rather than dataclass(slots=True) so
+they still work on Python 3.9) because one instance is built per row.
+All database operations are now handled directly by supabase_utils.py,
+which owns a single pooled HTTP client for the process; persist models
+through its functions rather than opening new Supabase clients.
 """
 
 import json
 import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 
 @dataclass
 class OrganizationInfo:
     """Secure organization information"""
+    __slots__ = (
+        "id",
+        "name",
+        "mission",
+        "description",
+        "key_accomplishments",
+        "partnerships",
+        "impact_metrics",
+        "created_at",
+        "updated_at",
+    )
     id: str
     name: str
     mission: str
@@ -26,6 +41,18 @@ class OrganizationInfo:
 @dataclass
 class RFPDocument:
     """RFP document with analysis"""
+    __slots__ = (
+        "id",
+        "project_id",
+        "filename",
+        "content",
+        "requirements",
+        "eligibility_criteria",
+        "funding_amount",
+        "deadline",
+        "analysis_result",
+        "created_at",
+    )
     id: str
     project_id: str
     filename: str
@@ -40,6 +67,18 @@ class RFPDocument:
 @dataclass
 class ProjectResponse:
     """Project-specific response to RFP"""
+    __slots__ = (
+        "id",
+        "project_id",
+        "rfp_id",
+        "org_id",
+        "narrative",
+        "sections",
+        "alignment_score",
+        "recommendations",
+        "created_at",
+        "updated_at",
+    )
     id: str
     project_id: str
     rfp_id: str
@@ -54,11 +93,20 @@ class ProjectResponse:
 @dataclass
 class SecureData:
     """Securely stored sensitive information"""
+    __slots__ = ("id", "file_chunk_id", "original_text", "redactions", "created_at")
     id: str
     file_chunk_id: int
     original_text: str
     redactions: List[Dict[str, Any]]
     created_at: str
 
+def to_dict(obj: Any) -> Dict[str, Any]:
+    """Return a shallow dict of a model's fields for JSON serialization.
+
+    Unlike dataclasses.asdict this does not deep-copy list and dict fields,
+    which are handed straight to the Supabase client anyway.
+    """
+    return {f.name: getattr(obj, f.name) for f in fields(obj)}
+
 # All database operations are now handled directly by supabase_utils.py
 # This file only contains data models for type safety and documentation
\ No newline at end of file
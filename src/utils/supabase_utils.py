@@ -11,18 +11,35 @@ Supabase REST API does not currently expose pgvector operators via HTTP.
 Operations implemented include inserting and updating clients, projects,
 files, file chunks, and questions.  Each function returns simple Python
 objects (or True/False for writes) and should raise no exceptions — errors are logged and
-rolled back internally.
+rolled back internally.  The one exception is the iter_rows generator, which
+raises when the stream fails so callers never mistake a partial read for the
+whole table.
 """
 
 from __future__ import annotations
 
-import json
+import asyncio
+import atexit
+import hashlib
+import logging
 import os
-from typing import Any, Iterable, Optional, Dict, List
-
-import requests
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, Optional, Dict, List
+from urllib.parse import quote
+
+import httpx
+import ijson
+import numpy as np
+import orjson
+from cachetools import TTLCache
 from openai import OpenAI
 
+logger = logging.getLogger(__name__)
+
 # Load Supabase configuration from config.py.  We import lazily to avoid
 # circular dependencies when the FastAPI app determines which util module
 # to use.  Relative import is attempted first for local execution and
@@ -42,34 +59,177 @@ def get_openai_client() -> OpenAI:
     return get_openai_client.client  # type: ignore
 
 
-def _batch(iterable: list[str], n: int) -> list[list[str]]:
+# Upper bound on rows per bulk insert, keeping request bodies well under
+# PostgREST/proxy size limits for large uploads.
+_INSERT_BATCH_SIZE = 1000
+
+
+def _batch(iterable: list[Any], n: int) -> list[list[Any]]:
     """Yield successive n-sized batches from iterable."""
     return [iterable[i:i + n] for i in range(0, len(iterable), n)]
 
 
-def create_embeddings(chunks: list[str]) -> list[list[float]]:
-    """Create embeddings for a list of text chunks using OpenAI.
+_EMBEDDING_MODEL = "text-embedding-ada-002"
 
-    The OpenAI embeddings endpoint limits total tokens per request; we therefore
-    break large uploads into smaller batches (e.g., 100 chunks) to stay under
-    the limit and avoid 400 errors.
-    """
+# Embeddings are deterministic per (model, text), so they are cached on disk
+# across restarts; re-uploaded documents and repeated boilerplate never go
+# back to the API (optional, disabled when diskcache is not installed).
+try:
+    import diskcache
+    _embedding_cache = diskcache.Cache(
+        os.path.expanduser(config.EMBEDDING_CACHE_DIR),
+        size_limit=512 * 1024 * 1024,
+        eviction_policy="least-recently-used",
+    )
+except Exception as e:
+    logger.warning("⚠️ Embedding cache disabled: %s", e)
+    _embedding_cache = None
+
+
+def _embedding_key(text: str) -> bytes:
+    return hashlib.sha256(f"{_EMBEDDING_MODEL}\0{text}".encode("utf-8")).digest()
+
+
+def _fetch_embeddings(chunks: list[str]) -> np.ndarray:
+    """Call the OpenAI embeddings API for chunks, in request-sized batches."""
     client = get_openai_client()
     all_embeddings: list[list[float]] = []
     # Use batches of 100 inputs – this keeps us well below the 300k-token limit
     for batch in _batch(chunks, 10):
-        response = client.embeddings.create(model="text-embedding-ada-002", input=batch)
+        response = client.embeddings.create(model=_EMBEDDING_MODEL, input=batch)
         all_embeddings.extend([e.embedding for e in response.data])
-    return all_embeddings
+    return np.asarray(all_embeddings, dtype=np.float32)
 
 
-def _build_headers() -> dict[str, str]:
-    """Construct the headers required for Supabase REST requests."""
-    return {
-        "apikey": config.SUPABASE_KEY,
-        "Authorization": f"Bearer {config.SUPABASE_KEY}",
-        "Content-Type": "application/json",
-    }
+def create_embeddings(chunks: list[str]) -> np.ndarray:
+    """Create embeddings for a list of text chunks using OpenAI.
+
+    The OpenAI embeddings endpoint limits total tokens per request; we therefore
+    break large uploads into smaller batches (e.g., 100 chunks) to stay under
+    the limit and avoid 400 errors.  Chunks already in the on-disk cache are
+    not sent at all; only misses are embedded and then written back.
+
+    Returns a float32 array with one row per chunk; orjson serializes it
+    directly when the rows are sent to Supabase.
+    """
+    if _embedding_cache is None:
+        return _fetch_embeddings(chunks)
+    keys = [_embedding_key(text) for text in chunks]
+    embeddings = [_embedding_cache.get(key) for key in keys]
+    misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if misses:
+        fresh = _fetch_embeddings([chunks[i] for i in misses])
+        for i, embedding in zip(misses, fresh):
+            embeddings[i] = embedding
+            _embedding_cache.set(keys[i], embedding)
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def _quantize_embedding(vec: list[float]) -> tuple[bytes, float]:
+    """Quantize an embedding to int8 with a symmetric per-vector scale.
+
+    Returns the int8 bytes and the scale needed to reconstruct the floats.
+    """
+    arr = np.asarray(vec, dtype=np.float32)
+    scale = float(np.abs(arr).max()) / 127 or 1.0
+    q = np.clip(np.rint(arr / scale), -127, 127).astype(np.int8)
+    return q.tobytes(), scale
+
+
+# Base URL for every request, normalized once rather than per call.
+_BASE_URL: str = (config.SUPABASE_URL or "").rstrip("/")
+
+# Headers required for Supabase REST requests.  The key is fixed for the
+# life of the process, so they are built once at import.
+_HEADERS: dict[str, str] = {
+    "apikey": config.SUPABASE_KEY,
+    "Authorization": f"Bearer {config.SUPABASE_KEY}",
+    "Content-Type": "application/json",
+}
+
+
+# A single HTTP/2 client is shared by every request, so concurrent calls
+# from worker threads are multiplexed over one kept-alive TCP/TLS connection
+# instead of opening a connection each.  Callers should always go through
+# _request rather than creating their own HTTP clients.  The static auth
+# headers live on the client; connection failures are retried by the
+# transport; idempotent requests are retried on rate limits and transient
+# server errors, and writes only when the server says it did not run them.
+_client = httpx.Client(
+    headers=_HEADERS,
+    timeout=30.0,
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    ),
+)
+atexit.register(_client.close)
+
+# Worker threads for independent reads issued together on _client
+_read_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="supabase-read")
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Statuses meaning the request was rejected before it ran, so even
+# non-idempotent writes are safe to resend
+_REJECTED_STATUSES = frozenset({429, 503})
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+_MAX_RETRIES = 3
+_MAX_RETRY_DELAY = 10.0
+
+
+def _prepare_request(kwargs: dict[str, Any]) -> bool:
+    """Apply the module's request options to kwargs; return count."""
+    # Client headers carry the defaults; callers may override them per request
+    if kwargs.pop("minimal", False):
+        # Writes whose result is only checked for success skip echoing the row
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Prefer": "return=minimal"}
+    count = kwargs.pop("count", False)
+    if count:
+        # The total is reported in Content-Range, so callers can limit the body
+        kwargs["headers"] = {**kwargs.get("headers", {}), "Prefer": "count=exact"}
+    if "json" in kwargs:
+        # Encode bodies with orjson; Content-Type is already on the client
+        kwargs["content"] = orjson.dumps(kwargs.pop("json"), option=orjson.OPT_SERIALIZE_NUMPY)
+    return count
+
+
+def _should_retry(method: str, response: httpx.Response, attempt: int) -> bool:
+    status = response.status_code
+    return (attempt < _MAX_RETRIES
+            and status in _RETRY_STATUSES
+            and (method in _IDEMPOTENT_METHODS or status in _REJECTED_STATUSES))
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying: Retry-After if given, else jittered backoff."""
+    retry_after = response.headers.get("retry-after", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), _MAX_RETRY_DELAY)
+    # Full jitter keeps concurrent workers from retrying in lockstep
+    return random.uniform(0, 0.2 * 2 ** (attempt + 1))
+
+
+def _handle_response(response: httpx.Response, count: bool) -> Optional[Any]:
+    """Turn a Supabase response into the value _request returns."""
+    # 2xx responses indicate success
+    if response.is_success:
+        # Return JSON if present; some operations (insert) may return
+        # an empty body when Prefer=return=minimal is used.
+        body: Any = True
+        if response.content:
+            try:
+                body = orjson.loads(response.content)
+            except orjson.JSONDecodeError:
+                body = response.text
+        if count:
+            # Content-Range looks like "0-0/42" (or "*/0" for no rows)
+            total = int(response.headers.get("content-range", "*/0").rsplit("/", 1)[1])
+            return body, total
+        return body
+    # response.text decodes the whole body; skip it when muted
+    if logger.isEnabledFor(logging.WARNING):
+        logger.warning("Supabase request failed: %s %s", response.status_code, response.text)
+    return None
 
 
 def _request(method: str, path: str, **kwargs: Any) -> Optional[Any]:
@@ -79,37 +239,80 @@ def _request(method: str, path: str, **kwargs: Any) -> Optional[Any]:
         method: The HTTP method (GET, POST, PATCH, DELETE).
         path: The path to append to the base Supabase URL (should start
             with "/rest/v1/").
-        kwargs: Additional arguments passed through to requests.request().
+        kwargs: Additional arguments passed through to httpx.Client.request().
+            ``count=True`` asks PostgREST for the exact number of matching
+            rows, which is returned alongside the body.
 
     Returns:
         The parsed JSON response if successful, or or the response text if not JSON, or None on error.
+        With ``count=True`` a successful call returns ``(body, total)``.
     """
-    if not config.SUPABASE_URL or not config.SUPABASE_KEY:
-        print("Supabase configuration missing; cannot perform request")
+    if not _BASE_URL or not config.SUPABASE_KEY:
+        logger.error("Supabase configuration missing; cannot perform request")
         return None
-    url = config.SUPABASE_URL.rstrip("/") + path
-    headers = _build_headers()
-    # Merge custom headers but allow caller to override defaults
-    custom_headers = kwargs.pop("headers", {})
-    headers.update(custom_headers)
+    url = _BASE_URL + path
+    count = _prepare_request(kwargs)
     try:
-        response = requests.request(method, url, headers=headers, **kwargs)
-        # 2xx responses indicate success
-        if response.ok:
-            # Return JSON if present; some operations (insert) may return
-            # an empty body when Prefer=return=minimal is used.
-            if response.text:
-                try:
-                    return response.json()
-                except Exception:
-                    return response.text
-            return True
-        else:
-            # Print the error for debugging
-            print(f"Supabase request failed: {response.status_code} {response.text}")
-            return None
+        for attempt in range(_MAX_RETRIES + 1):
+            response = _client.request(method, url, **kwargs)
+            if not _should_retry(method, response, attempt):
+                break
+            time.sleep(_retry_delay(response, attempt))
+        if method not in ("GET", "HEAD"):
+            # After the write lands; a read already in flight sees the bumped
+            # generation in _cached_query and does not cache its old rows
+            _invalidate_query_cache(path)
+        return _handle_response(response, count)
+    except Exception as e:
+        logger.error("Supabase request exception: %s", e)
+        return None
+
+
+# Async counterpart of _client for code running on the event loop.  It is
+# created on first use so it binds to the loop that serves requests.
+_aclient: Optional[httpx.AsyncClient] = None
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _aclient
+    if _aclient is None:
+        _aclient = httpx.AsyncClient(
+            headers=_HEADERS,
+            timeout=30.0,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            ),
+        )
+    return _aclient
+
+
+async def _arequest(method: str, path: str, **kwargs: Any) -> Optional[Any]:
+    """Async version of _request with the same options and return values.
+
+    Lets async endpoints await Supabase instead of blocking the event loop,
+    and lets independent calls overlap with asyncio.gather.
+    """
+    if not _BASE_URL or not config.SUPABASE_KEY:
+        logger.error("Supabase configuration missing; cannot perform request")
+        return None
+    url = _BASE_URL + path
+    count = _prepare_request(kwargs)
+    try:
+        client = _get_async_client()
+        for attempt in range(_MAX_RETRIES + 1):
+            response = await client.request(method, url, **kwargs)
+            if not _should_retry(method, response, attempt):
+                break
+            await asyncio.sleep(_retry_delay(response, attempt))
+        if method not in ("GET", "HEAD"):
+            # After the write lands; a read already in flight sees the bumped
+            # generation in _cached_query and does not cache its old rows
+            _invalidate_query_cache(path)
+        return _handle_response(response, count)
     except Exception as e:
-        print(f"Supabase request exception: {e}")
+        logger.error("Supabase request exception: %s", e)
         return None
 
 
@@ -126,13 +329,69 @@ def query_data(table_name: str) -> Optional[Any]:
     Returns:
         A list of rows (dictionaries) or None if an error occurred.
     """
-    return _request("GET", f"/rest/v1/{table_name}?select=*")
+    return _cached_query(table_name, f"/rest/v1/{table_name}?select=*")
+
+
+def _cached_query(table_name: str, path: str) -> Optional[Any]:
+    """GET path, serving repeat reads from _query_cache for a few seconds."""
+    key = (table_name, path)
+    with _cache_lock:
+        cached = _query_cache.get(key)
+        generation = _query_generation(table_name)
+    if cached is not None:
+        return list(cached)
+    res = _request("GET", path)
+    if isinstance(res, list):
+        with _cache_lock:
+            # A write to the table since the GET started may not be in res
+            if _query_generation(table_name) == generation:
+                _query_cache[key] = res
+        return list(res)
+    return res
+
+
+def iter_rows(table_name: str, query: str = "select=*") -> Iterator[Dict[str, Any]]:
+    """Yield rows from a table one at a time as the response streams in.
+
+    Full-table selects are parsed incrementally with ijson, so callers that
+    only iterate never hold the whole JSON array (or the raw body) in memory.
+
+    Args:
+        table_name: The name of the table to query.
+        query: PostgREST query string (filters and select list).
+
+    Raises:
+        RuntimeError: If Supabase is not configured, rejects the query, or
+            the stream fails part-way.  Rows already yielded are then only
+            part of the result, so callers should discard them.
+    """
+    if not _BASE_URL or not config.SUPABASE_KEY:
+        raise RuntimeError("Supabase configuration missing; cannot perform request")
+    url = f"{_BASE_URL}/rest/v1/{table_name}?{query}"
+    try:
+        with _client.stream("GET", url) as response:
+            if not response.is_success:
+                response.read()
+                raise RuntimeError(f"Supabase request failed: {response.status_code} {response.text}")
+            rows = ijson.sendable_list()
+            parser = ijson.items_coro(rows, "item")
+            for chunk in response.iter_bytes():
+                parser.send(chunk)
+                yield from rows
+                del rows[:]
+            parser.close()
+            yield from rows
+    except RuntimeError:
+        raise
+    except Exception as e:
+        logger.error("Supabase request exception: %s", e)
+        raise RuntimeError(f"Supabase stream from {table_name} failed: {e}") from e
 
 
 def query_questions(project_id: str) -> Optional[Any]:
     """Return all question records for a given project ID via Supabase."""
-    return _request(
-        "GET",
+    return _cached_query(
+        "questions",
         f"/rest/v1/questions?project_id=eq.{project_id}&select=*",
     )
 
@@ -140,12 +399,11 @@ def query_questions(project_id: str) -> Optional[Any]:
 def insert_file(filename: str) -> bool:
     """Insert a file record into the files table."""
     data = {"file_name": filename}
-    # Prefer return=representation so we get the inserted row back
     res = _request(
         "POST",
         "/rest/v1/files",
         json=data,
-        headers={"Prefer": "return=representation"},
+        minimal=True,
     )
     return bool(res)
 
@@ -162,7 +420,7 @@ def insert_project(project_name: str, project_description: str, client_id: int |
         "POST",
         "/rest/v1/projects",
         json=data,
-        headers={"Prefer": "return=representation"},
+        minimal=True,
     )
     return bool(res)
 
@@ -178,80 +436,183 @@ def delete_questions_from_db(project_id: int) -> bool:
 
 
 def insert_questions_into_db(questions: Iterable[Any]) -> bool:
-    """Insert a collection of question records into the questions table."""
-    success = True
-    for q in questions.questions:
-        data = {
+    """Insert a collection of question records into the questions table.
+
+    Rows go in bulk POSTs of up to _INSERT_BATCH_SIZE, each of which
+    PostgREST runs as a single INSERT: a batch is stored whole or not at all,
+    and the failure body (including the offending row on constraint errors)
+    is logged by _request.  Accepts a model with a ``questions`` list or any
+    iterable of questions; an empty input is a successful no-op without a
+    round trip.
+    """
+    for batch in _batch(_question_rows(questions), _INSERT_BATCH_SIZE):
+        res = _request(
+            "POST",
+            "/rest/v1/questions",
+            json=batch,
+            minimal=True,
+        )
+        if res is None:
+            return False
+    return True
+
+
+def _question_rows(questions: Any) -> list[dict[str, Any]]:
+    """Convert question records (or a model wrapping them) to table rows."""
+    return [
+        {
             "question": q.question,
             "answer": q.answer,
             "project_id": q.project_id,
             "embedding": q.embedding,
             "chat_history": q.chat_history,
         }
+        for q in getattr(questions, "questions", questions)
+    ]
+
+
+def save_questions(project_id: int, questions: Any) -> bool:
+    """Replace all questions for a project with the provided list.
+
+    The delete and insert run in one transaction on the server (see
+    pgvector/save_questions.sql), so readers never see an empty set and a
+    failed insert leaves the previous questions in place.
+    """
+    res = _request(
+        "POST",
+        "/rest/v1/rpc/save_questions",
+        json={"p_project_id": project_id, "p_rows": _question_rows(questions)},
+    )
+    return res is not None
+
+
+# Chunks are keyed by their position in the file (see
+# pgvector/file_chunks_upsert.sql), so re-indexing a file overwrites its rows;
+# _delete_stale_chunks then drops positions past the file's new length.
+_FILE_CHUNKS_UPSERT = "/rest/v1/file_chunks?on_conflict=project_id,file_name,chunk_index"
+
+
+def _delete_stale_chunks(rows: list[dict[str, Any]], project_id: Optional[str]) -> bool:
+    """Delete chunks left over from a longer, earlier version of each file."""
+    chunk_counts: dict[str, int] = {}
+    for row in rows:
+        chunk_counts[row["file_name"]] = row["chunk_index"] + 1
+    project_filter = f"project_id=eq.{project_id}" if project_id is not None else "project_id=is.null"
+    ok = True
+    for file_name, count in chunk_counts.items():
         res = _request(
-            "POST",
-            "/rest/v1/questions",
-            json=data,
-            headers={"Prefer": "return=representation"},
+            "DELETE",
+            f"/rest/v1/file_chunks?{project_filter}"
+            f"&file_name=eq.{quote(file_name, safe='')}&chunk_index=gte.{count}",
         )
         if res is None:
-            success = False
-    return success
+            logger.warning("⚠️ Could not remove stale chunks for %s", file_name)
+            ok = False
+    return ok
 
 
-def save_questions(project_id: int, questions: Any) -> bool:
-    """Replace all questions for a project with the provided list."""
-    if delete_questions_from_db(project_id):
-        return insert_questions_into_db(questions)
-    return False
+def insert_file_chunks(chunks: Iterable[tuple[str, str]], project_id: str = None) -> list[int]:
+    """Insert file chunks and embeddings into the file_chunks table.
 
+    All chunks are embedded together and upserted in bulk POSTs of up to
+    _INSERT_BATCH_SIZE rows, so callers should accumulate every chunk of an
+    upload and call this once.  A file's chunks are numbered in the order
+    given; uploading it again replaces the file's rows, including any
+    trailing chunks the new version no longer has.
 
-def insert_file_chunks_into_db(chunks: Iterable[tuple[str, str]], project_id: str = None) -> Optional[int]:
-    """Insert file chunks and embeddings into the file_chunks table.
-    Returns the ID of the inserted chunk.
+    Returns:
+        The IDs of the inserted chunks, in input order (empty on error).
     """
+    data_to_insert = _file_chunk_rows(chunks, project_id)
+    ids: list[int] = []
+    for batch in _batch(data_to_insert, _INSERT_BATCH_SIZE):
+        # Only the generated ids are echoed back, not the chunk text and vectors
+        res = _request(
+            "POST",
+            f"{_FILE_CHUNKS_UPSERT}&select=id",
+            json=batch,
+            headers={"Prefer": "resolution=merge-duplicates,return=representation"},
+        )
+        if not (res and isinstance(res, list)):
+            return []
+        ids.extend(row.get("id") for row in res)
+    _delete_stale_chunks(data_to_insert, project_id)
+    return ids
+
+
+def save_file_chunks(chunks: Iterable[tuple[str, str]], project_id: str = None) -> bool:
+    """Insert file chunks and embeddings without echoing anything back.
+
+    Same rows and batching as insert_file_chunks, for callers that only
+    need to know whether the write succeeded.
+    """
+    data_to_insert = _file_chunk_rows(chunks, project_id)
+    for batch in _batch(data_to_insert, _INSERT_BATCH_SIZE):
+        res = _request(
+            "POST",
+            _FILE_CHUNKS_UPSERT,
+            json=batch,
+            headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
+        )
+        if res is None:
+            return False
+    return _delete_stale_chunks(data_to_insert, project_id)
+
+
+def _file_chunk_rows(chunks: Iterable[tuple[str, str]], project_id: Optional[str]) -> list[dict[str, Any]]:
+    """Embed (file_name, chunk_text) pairs and build file_chunks rows."""
+    # Materialize once so generators work and the input is only walked once
+    chunks = list(chunks)
     # Create embeddings for all chunks in one go
-    chunk_texts = [chunk_text for _, chunk_text in chunks]
-    embeddings = create_embeddings(chunk_texts)
+    embeddings = create_embeddings([chunk_text for _, chunk_text in chunks])
 
     # Supabase PostgREST can insert multiple rows at once if the data is a list of objects
-    data_to_insert = []
-    for i, (file_name, chunk_text) in enumerate(chunks):
-        data_to_insert.append({
+    data_to_insert: list[dict[str, Any]] = []
+    next_index: dict[str, int] = {}
+    for (file_name, chunk_text), embedding in zip(chunks, embeddings):
+        chunk_index = next_index.get(file_name, 0)
+        next_index[file_name] = chunk_index + 1
+        row = {
             "file_name": file_name,
             "chunk_text": chunk_text,
-            # pgvector expects string representation via PostgREST
-            "embedding": f"[{', '.join(str(x) for x in embeddings[i])}]",
             "project_id": project_id,
-        })
-    
-    res = _request(
-        "POST",
-        "/rest/v1/file_chunks",
-        json=data_to_insert,
-        headers={"Prefer": "return=representation"},
-    )
-    
-    if res and isinstance(res, list) and len(res) > 0:
-        # Assuming we only insert one chunk at a time for now, return its ID
-        return res[0].get("id")
-    return None
+            "chunk_index": chunk_index,
+            # Sent as a JSON array (encoded natively by orjson), which
+            # pgvector casts to vector just like its "[...]" text form.
+            # Retrieval orders by this column, so it is always written.
+            "embedding": embedding,
+        }
+        if config.QUANTIZE_EMBEDDINGS:
+            q_bytes, scale = _quantize_embedding(embedding)
+            # PostgREST accepts bytea as a \\x-prefixed hex string
+            row["embedding_int8"] = "\\x" + q_bytes.hex()
+            row["embedding_scale"] = scale
+        data_to_insert.append(row)
+    return data_to_insert
+
+
+def insert_file_chunks_into_db(chunks: Iterable[tuple[str, str]], project_id: str = None) -> Optional[int]:
+    """Insert file chunks and embeddings into the file_chunks table.
+    Returns the ID of the first inserted chunk.
+
+    Kept for existing callers; use insert_file_chunks to get every ID.
+    """
+    ids = insert_file_chunks(chunks, project_id)
+    return ids[0] if ids else None
+
+
+# Columns of the clients table that are copied from a client model
+_CLIENT_FIELDS = ("name", "organization", "contact_info", "demographics", "goals")
 
 
 def insert_client(client: Any) -> bool:
     """Insert a new client into the clients table."""
-    data = {
-        "name": client.name,
-        "organization": client.organization,
-        "contact_info": client.contact_info,
-        "demographics": client.demographics,
-        "goals": client.goals,
-    }
+    data = {field: getattr(client, field) for field in _CLIENT_FIELDS}
     res = _request(
         "POST",
         "/rest/v1/clients",
         json=data,
-        headers={"Prefer": "return=representation"},
+        minimal=True,
     )
     return bool(res)
 
@@ -259,22 +620,15 @@ def insert_client(client: Any) -> bool:
 def update_client(client_id: int, client: Any) -> bool:
     """Update an existing client's details."""
     # Build a dict of only the provided fields
-    data: dict[str, Any] = {}
-    if getattr(client, "name", None):
-        data["name"] = client.name
-    if getattr(client, "organization", None):
-        data["organization"] = client.organization
-    if getattr(client, "contact_info", None):
-        data["contact_info"] = client.contact_info
-    if getattr(client, "demographics", None):
-        data["demographics"] = client.demographics
-    if getattr(client, "goals", None):
-        data["goals"] = client.goals
+    data: dict[str, Any] = {
+        field: value for field in _CLIENT_FIELDS if (value := getattr(client, field, None))
+    }
     if not data:
         return True  # nothing to update
+    # Echo just the id so a missing client still yields an empty list
     res = _request(
         "PATCH",
-        f"/rest/v1/clients?id=eq.{client_id}",
+        f"/rest/v1/clients?id=eq.{client_id}&select=id",
         json=data,
         headers={"Prefer": "return=representation"},
     )
@@ -292,24 +646,95 @@ def rag_context(question: str, files: list[str], project_id: str = None) -> Opti
             f"/functions/v1/rag_context",
             json={"query": question, "files": files, "project_id": project_id},
         )
-        if response and isinstance(response, list) and len(response) > 0:
-            # Return the most relevant chunk (highest similarity)
-            return response[0].get("chunk_text")
+        return _top_chunk(response)
+    except Exception as e:
+        logger.error("Error calling rag_context Edge Function: %s", e)
         return None
+
+
+async def arag_context(question: str, files: list[str], project_id: str = None) -> Optional[str]:
+    """Async version of rag_context for use inside request handlers."""
+    try:
+        response = await _arequest(
+            "POST",
+            "/functions/v1/rag_context",
+            json={"query": question, "files": files, "project_id": project_id},
+        )
+        return _top_chunk(response)
     except Exception as e:
-        print(f"Error calling rag_context Edge Function: {e}")
+        logger.error("Error calling rag_context Edge Function: %s", e)
         return None
 
+
+def _top_chunk(response: Any) -> Optional[str]:
+    # The function returns the best chunk's text directly; older
+    # deployments still return a list of rows ordered by similarity.
+    if isinstance(response, str):
+        return response
+    if response and isinstance(response, list):
+        return response[0].get("chunk_text")
+    return None
+
 # ---------------------------------------------------------------------------
 # Chat History Functions for RAG
 # ---------------------------------------------------------------------------
 
+# Short-lived read caches.  Project context and formatted chat history are
+# read several times per request (summary, update, chat), so they are kept
+# for 30s and dropped whenever this module writes to them.  Organizations and
+# RFPs are never updated in place, so found rows are cached for longer.
+# query_data/query_questions results are keyed by (table, path) and dropped
+# by _request whenever a write touches that table.  Each invalidation also
+# bumps a generation counter, so a read that started before the write does
+# not store its now-stale rows.
+_ctx_cache: TTLCache = TTLCache(maxsize=512, ttl=30)
+_chat_history_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
+_record_cache: TTLCache = TTLCache(maxsize=256, ttl=300)
+_query_cache: TTLCache = TTLCache(maxsize=128, ttl=30)
+_cache_lock = threading.Lock()
+# Invalidation counters for _query_cache: per table, plus one bumped by RPCs
+# (which can touch any table).  Read and written under _cache_lock.
+_table_generations: Dict[str, int] = {}
+_rpc_generation = 0
+
+
+def _query_generation(table: str) -> tuple[int, int]:
+    """Current invalidation generation for a table; call under _cache_lock."""
+    return _rpc_generation, _table_generations.get(table, 0)
+
+
+def _invalidate_query_cache(path: str) -> None:
+    """Drop cached table reads that a write to path may have changed."""
+    global _rpc_generation
+    table = path.split("?", 1)[0].rsplit("/", 1)[-1]
+    with _cache_lock:
+        if path.startswith("/rest/v1/rpc/"):
+            # RPCs can touch any table
+            _rpc_generation += 1
+            _query_cache.clear()
+            return
+        _table_generations[table] = _table_generations.get(table, 0) + 1
+        for key in [key for key in _query_cache if key[0] == table]:
+            del _query_cache[key]
+
+
+def _invalidate_project_context(project_id: str) -> None:
+    with _cache_lock:
+        _ctx_cache.pop(project_id, None)
+
+
+def _invalidate_chat_history(project_id: str) -> None:
+    with _cache_lock:
+        _chat_history_cache.pop(project_id, None)
+
+
 def save_chat_message(project_id: str, conversation_data: dict[str, Any]) -> bool:
     """Save a chat message for RAG context.
     
     Args:
         project_id: Project ID
-        conversation_data: Dictionary with user_message, ai_response, and timestamp
+        conversation_data: Dictionary with user_message, ai_response and an
+            optional timestamp (Postgres defaults it to now() when omitted)
         
     Returns:
         True if successful, False otherwise
@@ -318,17 +743,19 @@ def save_chat_message(project_id: str, conversation_data: dict[str, Any]) -> boo
         "project_id": project_id,
         "user_message": conversation_data.get("user_message", ""),
         "ai_response": conversation_data.get("ai_response", ""),
-        "timestamp": conversation_data.get("timestamp"),
         "message_type": conversation_data.get("message_type", "chat"),
         "metadata": conversation_data.get("metadata", {})
     }
+    if conversation_data.get("timestamp"):
+        data["timestamp"] = conversation_data["timestamp"]
     
     res = _request(
         "POST",
         "/rest/v1/chat_messages",
         json=data,
-        headers={"Prefer": "return=representation"},
+        minimal=True,
     )
+    _invalidate_chat_history(project_id)
     return bool(res)
 
 def get_chat_history(project_id: str) -> str:
@@ -340,6 +767,17 @@ def get_chat_history(project_id: str) -> str:
     Returns:
         Formatted chat history string
     """
+    with _cache_lock:
+        cached = _chat_history_cache.get(project_id)
+    if cached is None:
+        cached = _format_chat_history(project_id)
+        with _cache_lock:
+            _chat_history_cache[project_id] = cached
+    return cached
+
+
+def _format_chat_history(project_id: str) -> str:
+    """Fetch the last 10 chat messages and format them for a prompt."""
     # Get last 10 messages for context
     res = _request(
         "GET",
@@ -378,6 +816,15 @@ def get_chat_messages(project_id: str) -> list[dict[str, Any]]:
     
     return res
 
+
+async def aget_chat_messages(project_id: str) -> list[dict[str, Any]]:
+    """Async version of get_chat_messages for use inside request handlers."""
+    res = await _arequest(
+        "GET",
+        f"/rest/v1/chat_messages?project_id=eq.{project_id}&order=timestamp.asc&select=*"
+    )
+    return res or []
+
 def delete_chat_history(project_id: str) -> bool:
     """Delete chat history for a project.
     
@@ -391,6 +838,7 @@ def delete_chat_history(project_id: str) -> bool:
         "DELETE",
         f"/rest/v1/chat_messages?project_id=eq.{project_id}"
     )
+    _invalidate_chat_history(project_id)
     return res is not None
 
 # ---------------------------------------------------------------------------
@@ -409,35 +857,47 @@ def save_uploaded_file(file_content: bytes, filename: str, project_id: str) -> d
         Dictionary with file info and extracted text
     """
     try:
-        # For now, we'll store basic file info
-        # In a full implementation, you'd want to store the file content
-        # in Supabase Storage and reference it here
+        # The raw bytes go to Supabase Storage under a content hash so the
+        # files row stays small; identical uploads map to the same object.
+        file_type = filename.split('.')[-1].lower() if '.' in filename else "unknown"
+        storage_path = f"{config.SUPABASE_STORAGE_BUCKET}/{hashlib.sha256(file_content).hexdigest()}.{file_type}"
+        stored = _request(
+            "POST",
+            f"/storage/v1/object/{storage_path}",
+            content=file_content,
+            headers={"Content-Type": "application/octet-stream", "x-upsert": "true"},
+        )
+        if not stored:
+            logger.warning("⚠️ Could not store %s in Supabase Storage; saving metadata only", filename)
+        
         data = {
             "file_name": filename,
             "project_id": project_id,
             "file_size": len(file_content),
-            "file_type": filename.split('.')[-1].lower() if '.' in filename else "unknown"
+            "file_type": file_type,
+            "storage_path": storage_path if stored else None
         }
         
         res = _request(
             "POST",
             "/rest/v1/files",
             json=data,
-            headers={"Prefer": "return=representation"},
+            minimal=True,
         )
+        _invalidate_project_context(project_id)
         
         if res:
             return {
                 "success": True,
                 "filename": filename,
                 "file_size": len(file_content),
-                "uploaded_at": res.get("created_at")
+                "uploaded_at": datetime.now(timezone.utc).isoformat()
             }
         else:
             return {"success": False, "error": "Failed to save file"}
             
     except Exception as e:
-        print(f"❌ Error saving file: {e}")
+        logger.error("❌ Error saving file: %s", e)
         return {"success": False, "error": str(e)}
 
 def insert_secure_data(file_chunk_id: int, original_text: str, redactions: list) -> Optional[int]:
@@ -451,7 +911,7 @@ def insert_secure_data(file_chunk_id: int, original_text: str, redactions: list)
     }
     res = _request(
         "POST",
-        "/rest/v1/secure_storage",
+        "/rest/v1/secure_storage?select=id",
         json=data,
         headers={"Prefer": "return=representation"},
     )
@@ -463,29 +923,48 @@ def insert_secure_data(file_chunk_id: int, original_text: str, redactions: list)
 def get_project_context(project_id: str) -> dict[str, Any]:
     """Get all context data for a project from Supabase.
     
+    Results are cached per project for a few seconds; writes made through
+    this module invalidate the entry.
+    
     Args:
         project_id: Project ID
         
     Returns:
         Dictionary with project context
     """
-    print(f"🔍 DEBUG: Getting project context for {project_id}")
-    print(f"🔍 DEBUG: Supabase URL: {config.SUPABASE_URL}")
-    print(f"🔍 DEBUG: Supabase Key configured: {'Yes' if config.SUPABASE_KEY else 'No'}")
+    with _cache_lock:
+        cached = _ctx_cache.get(project_id)
+    if cached is None:
+        cached = _fetch_project_context(project_id)
+        with _cache_lock:
+            _ctx_cache[project_id] = cached
+    # Hand out copies so callers cannot mutate the cached entry
+    return dict(cached, files=list(cached["files"]))
+
+
+def _fetch_project_context(project_id: str) -> dict[str, Any]:
+    """Load project context and its file list from Supabase."""
+    logger.debug("🔍 Getting project context for %s", project_id)
+    logger.debug("🔍 Supabase URL: %s", config.SUPABASE_URL)
+    logger.debug("🔍 Supabase Key configured: %s", "Yes" if config.SUPABASE_KEY else "No")
     
-    # Get project context
-    res = _request(
+    # The context row and the file list are independent reads, so the
+    # context GET runs on the read pool and both are multiplexed over the
+    # shared HTTP/2 connection instead of waiting on each other
+    ctx_future = _read_pool.submit(
+        _request,
         "GET",
         f"/rest/v1/project_contexts?project_id=eq.{project_id}&select=*"
     )
-    print(f"🔍 DEBUG: Project context response: {res}")
     
     # Get files for this project
     files_res = _request(
         "GET",
         f"/rest/v1/files?project_id=eq.{project_id}&select=file_name,created_at&order=created_at.desc"
     )
-    print(f"🔍 DEBUG: Files response: {files_res}")
+    res = ctx_future.result()
+    logger.debug("🔍 Project context response: %s", res)
+    logger.debug("🔍 Files response: %s", files_res)
     
     # Build files list
     files = []
@@ -493,7 +972,7 @@ def get_project_context(project_id: str) -> dict[str, Any]:
         for file_data in files_res:
             files.append(file_data.get("file_name", ""))
     
-    print(f"🔍 DEBUG: Files list: {files}")
+    logger.debug("🔍 Files list: %s", files)
     
     if res and len(res) > 0:
         context = res[0]
@@ -529,28 +1008,22 @@ def update_project_info(project_id: str, organization_info: str = "", initiative
         True if successful, False otherwise
     """
     data = {
+        "project_id": project_id,
         "organization_info": organization_info,
-        "initiative_description": initiative_description,
-        "updated_at": "now()"
+        "initiative_description": initiative_description
     }
     
+    # Single upsert on the unique project_id (see
+    # pgvector/project_contexts_upsert.sql) instead of PATCH-then-POST;
+    # updated_at is set by a trigger (pgvector/server_timestamps.sql)
     res = _request(
-        "PATCH",
-        f"/rest/v1/project_contexts?project_id=eq.{project_id}",
+        "POST",
+        "/rest/v1/project_contexts?on_conflict=project_id",
         json=data,
-        headers={"Prefer": "return=representation"},
+        headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
     )
     
-    if not res:
-        # Try to create new record if update failed
-        data["project_id"] = project_id
-        res = _request(
-            "POST",
-            "/rest/v1/project_contexts",
-            json=data,
-            headers={"Prefer": "return=representation"},
-        )
-    
+    _invalidate_project_context(project_id)
     return bool(res)
 
 def get_context_summary(project_id: str) -> str:
@@ -585,59 +1058,44 @@ def delete_project_context(project_id: str) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    # Delete project context
-    context_res = _request(
-        "DELETE",
-        f"/rest/v1/project_contexts?project_id=eq.{project_id}"
-    )
-    
-    # Delete files
-    files_res = _request(
-        "DELETE",
-        f"/rest/v1/files?project_id=eq.{project_id}"
-    )
-    
-    # Delete chat messages
-    chat_res = _request(
-        "DELETE",
-        f"/rest/v1/chat_messages?project_id=eq.{project_id}"
+    # Context, files and chat messages go in one transaction on the server
+    # (see pgvector/delete_project_cascade.sql)
+    res = _request(
+        "POST",
+        "/rest/v1/rpc/delete_project_cascade",
+        json={"pid": project_id},
     )
-    
-    return context_res is not None and files_res is not None and chat_res is not None
+    _invalidate_project_context(project_id)
+    _invalidate_chat_history(project_id)
+    return res is not None
 
 # Project management functions
 def get_all_projects() -> list[dict[str, Any]]:
     """Get all projects from Supabase."""
     try:
-        # Get all files grouped by project_id
+        # One row per project, aggregated in Postgres (see
+        # pgvector/project_summary.sql) rather than grouping every file here
         res = _request(
             "GET",
-            "/rest/v1/files?select=project_id,created_at&order=created_at.desc"
+            "/rest/v1/project_summary?select=project_id,file_count,updated_at&order=updated_at.desc"
         )
         
         if not res:
             return []
         
-        # Group by project_id and get the latest activity
-        projects = {}
-        for file_data in res:
-            project_id = file_data.get("project_id")
-            if project_id:
-                if project_id not in projects:
-                    projects[project_id] = {
-                        "id": project_id,
-                        "name": f"Project {project_id[:8]}",
-                        "description": "Project with uploaded files",
-                        "created_at": file_data.get("created_at"),
-                        "updated_at": file_data.get("created_at"),
-                        "file_count": 1
-                    }
-                else:
-                    projects[project_id]["file_count"] += 1
-        
-        return list(projects.values())
+        return [
+            {
+                "id": row["project_id"],
+                "name": f"Project {row['project_id'][:8]}",
+                "description": "Project with uploaded files",
+                "created_at": row["updated_at"],
+                "updated_at": row["updated_at"],
+                "file_count": row["file_count"]
+            }
+            for row in res
+        ]
     except Exception as e:
-        print(f"❌ Error getting all projects: {e}")
+        logger.error("❌ Error getting all projects: %s", e)
         return []
 
 def create_project(project_data: dict[str, Any]) -> dict[str, Any]:
@@ -665,21 +1123,23 @@ def create_project(project_data: dict[str, Any]) -> dict[str, Any]:
         else:
             return None
     except Exception as e:
-        print(f"❌ Error creating project: {e}")
+        logger.error("❌ Error creating project: %s", e)
         return None
 
 def get_project(project_id: str) -> Optional[dict[str, Any]]:
     """Get a specific project from Supabase."""
     try:
-        # Get files for this project
+        # Fetch only the latest file's timestamp; the count comes back
+        # in the response headers rather than as one row per file
         res = _request(
             "GET",
-            f"/rest/v1/files?project_id=eq.{project_id}&select=*&order=created_at.desc"
+            f"/rest/v1/files?project_id=eq.{project_id}&select=created_at&order=created_at.desc&limit=1",
+            count=True,
         )
         
-        if res and len(res) > 0:
-            latest_file = res[0]
-            file_count = len(res)
+        if res and res[1] > 0:
+            rows, file_count = res
+            latest_file = rows[0]
             
             return {
                 "id": project_id,
@@ -691,86 +1151,70 @@ def get_project(project_id: str) -> Optional[dict[str, Any]]:
             }
         return None
     except Exception as e:
-        print(f"❌ Error getting project: {e}")
+        logger.error("❌ Error getting project: %s", e)
         return None
 
 def delete_project(project_id: str) -> bool:
     """Delete a project and all its data from Supabase."""
     try:
         # Delete all data associated with the project
-        context_res = _request(
-            "DELETE",
-            f"/rest/v1/project_contexts?project_id=eq.{project_id}"
-        )
-        
-        files_res = _request(
-            "DELETE",
-            f"/rest/v1/files?project_id=eq.{project_id}"
-        )
-        
-        chat_res = _request(
-            "DELETE",
-            f"/rest/v1/chat_messages?project_id=eq.{project_id}"
-        )
-        
         # Note: embeddings and redactions tables might not exist in Supabase
         # so we'll skip those for now
-        
-        return context_res is not None and files_res is not None and chat_res is not None
+        return delete_project_context(project_id)
     except Exception as e:
-        print(f"❌ Error deleting project: {e}")
+        logger.error("❌ Error deleting project: %s", e)
         return False
 
 # New functions for storage_utils integration
-def insert_organization(org_data: Dict[str, Any]) -> bool:
-    """Insert organization data into the 'organizations' table."""
+
+def _insert_row(table: str, row: Dict[str, Any]) -> bool:
+    """Insert one row into a table and report whether it succeeded."""
     res = _request(
         "POST",
-        "/rest/v1/organizations",
-        json=org_data,
-        headers={"Prefer": "return=representation"},
+        f"/rest/v1/{table}",
+        json=row,
+        minimal=True,
     )
     return bool(res)
 
-def get_organization(org_id: str) -> Optional[Dict[str, Any]]:
-    """Get organization data from the 'organizations' table."""
+
+def _get_record(table: str, record_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch a row by id, caching rows that exist."""
+    key = (table, record_id)
+    with _cache_lock:
+        cached = _record_cache.get(key)
+    if cached is not None:
+        return dict(cached)
     res = _request(
         "GET",
-        f"/rest/v1/organizations?id=eq.{org_id}&select=*",
+        f"/rest/v1/{table}?id=eq.{record_id}&select=*",
     )
     if res and isinstance(res, list) and len(res) > 0:
-        return res[0]
+        with _cache_lock:
+            _record_cache[key] = res[0]
+        return dict(res[0])
     return None
 
+
+def insert_organization(org_data: Dict[str, Any]) -> bool:
+    """Insert organization data into the 'organizations' table."""
+    return _insert_row("organizations", org_data)
+
+def get_organization(org_id: str) -> Optional[Dict[str, Any]]:
+    """Get organization data from the 'organizations' table."""
+    return _get_record("organizations", org_id)
+
 def insert_rfp(rfp_data: Dict[str, Any]) -> bool:
     """Insert RFP data into the 'rfp_documents' table."""
-    res = _request(
-        "POST",
-        "/rest/v1/rfp_documents",
-        json=rfp_data,
-        headers={"Prefer": "return=representation"},
-    )
-    return bool(res)
+    return _insert_row("rfp_documents", rfp_data)
 
 def get_rfp(rfp_id: str) -> Optional[Dict[str, Any]]:
     """Get RFP data from the 'rfp_documents' table."""
-    res = _request(
-        "GET",
-        f"/rest/v1/rfp_documents?id=eq.{rfp_id}&select=*",
-    )
-    if res and isinstance(res, list) and len(res) > 0:
-        return res[0]
-    return None
+    return _get_record("rfp_documents", rfp_id)
 
 def insert_project_response(response_data: Dict[str, Any]) -> bool:
     """Insert project response data into the 'project_responses' table."""
-    res = _request(
-        "POST",
-        "/rest/v1/project_responses",
-        json=response_data,
-        headers={"Prefer": "return=representation"},
-    )
-    return bool(res)
+    return _insert_row("project_responses", response_data)
 
 def get_project_response(response_id: str) -> Optional[Dict[str, Any]]:
     """Get project response data from the 'project_responses' table."""
@@ -782,12 +1226,32 @@ def get_project_response(response_id: str) -> Optional[Dict[str, Any]]:
         return res[0]
     return None
 
-def get_all_projects_from_db() -> List[Dict[str, Any]]:
-    """Get all projects from the 'projects' table."""
+def get_all_projects_from_db(limit: int = 200) -> List[Dict[str, Any]]:
+    """Get the most recent projects from the 'projects' table.
+
+    Ordering and the row cap are applied by Postgres (served from
+    idx_projects_created_at), so the dashboard costs one bounded query.
+    """
     res = _request(
         "GET",
-        "/rest/v1/projects?select=*",
+        f"/rest/v1/projects?select=*&order=created_at.desc&limit={limit}",
     )
     if res and isinstance(res, list):
         return res
     return []
+
+
+def _warm_up_connection() -> None:
+    """Open the pooled Supabase connection ahead of the first real request.
+
+    DNS, TCP and the TLS/HTTP/2 handshake are paid here, on a background
+    thread at import, rather than by the first API call a fresh worker serves.
+    """
+    try:
+        _client.head(_BASE_URL + "/rest/v1/", timeout=5.0)
+    except Exception as e:
+        logger.warning("⚠️ Supabase connection warm-up failed: %s", e)
+
+
+if _BASE_URL and config.SUPABASE_KEY:
+    threading.Thread(target=_warm_up_connection, name="supabase-warmup", daemon=True).start()
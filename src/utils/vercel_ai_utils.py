@@ -5,10 +5,36 @@ enabling model switching, credit management, and abuse protection.
 """
 
 import os
-import json
-import requests
+import orjson
+import re
+import threading
+import time
+import asyncio
+import httpx
+from collections import deque
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+
+# Score patterns for evaluate_cultural_alignment, compiled once
+_SCORE_PATTERNS = {
+    dimension: re.compile(rf"{re.escape(dimension)}.*?(\d+)", re.IGNORECASE)
+    for dimension in ("Cultural Sensitivity", "Community Focus", "Cognitive Friendliness", "Overall Quality")
+}
+
+# Completion POSTs are not idempotent: a 502/504 may arrive after the model
+# already ran (and billed), so only a 503 carrying Retry-After, which says the
+# request was not processed, is resent.  Connect failures are retried by the
+# transport.
+_MAX_RETRIES = 3
+_MAX_RETRY_DELAY = 10.0
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait before resending a rejected completion, or None"""
+    if response.status_code != 503:
+        return None
+    try:
+        return min(float(response.headers["Retry-After"]), _MAX_RETRY_DELAY)
+    except (KeyError, ValueError):
+        return None
 
 class VercelAIGateway:
     """Vercel AI Gateway integration for unified model management"""
@@ -17,19 +43,75 @@ class VercelAIGateway:
         self.api_key = os.getenv('AI_GATEWAY_API_KEY')
         self.base_url = "https://api.vercel.ai/v1"
         self.rate_limit = 3  # requests per minute (free tier)
-        self.last_request_time = None
-        
-    def _check_rate_limit(self):
-        """Check rate limiting for free tier"""
-        if self.last_request_time:
-            time_diff = (datetime.now() - self.last_request_time).total_seconds()
-            if time_diff < 60:  # 1 minute
-                return False
-        return True
+        self.request_times = deque()  # monotonic times of recent reserved requests
+        # Guards request_times; reservations hold it only briefly and never
+        # across an await, so it serializes both threads and coroutines
+        self._rate_lock = threading.Lock()
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        # One pooled HTTP/2 client per gateway, so back-to-back calls reuse
+        # the open TLS connection instead of reconnecting for every completion
+        # Failed connects are retried by the transport; a 503 with
+        # Retry-After is resent by chat_completion
+        self._client = httpx.Client(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=30,
+            transport=httpx.HTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=8)
+            )
+        )
+        # Async client for running several completions concurrently
+        self._aclient = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=60,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(max_connections=8)
+            )
+        )
+    
+    def close(self):
+        """Close the sync client's pooled connections
+        
+        The async client is left open; use ``await aclose()`` to close both.
+        """
+        self._client.close()
+    
+    async def aclose(self):
+        """Close pooled connections, including the async client"""
+        self._client.close()
+        await self._aclient.aclose()
+        
+    def _reserve_rate_limit(self) -> Optional[float]:
+        """Claim a slot for the free tier (rate_limit requests per rolling minute)
+        
+        The slot is recorded before the request is sent, so concurrent calls
+        cannot all pass the check. Returns the slot's timestamp, or None when
+        the limit is reached.
+        """
+        with self._rate_lock:
+            now = time.monotonic()
+            while self.request_times and now - self.request_times[0] > 60:
+                self.request_times.popleft()
+            if len(self.request_times) >= self.rate_limit:
+                return None
+            self.request_times.append(now)
+            return now
     
-    def _update_rate_limit(self):
-        """Update rate limit tracking"""
-        self.last_request_time = datetime.now()
+    def _release_rate_limit(self, slot: float):
+        """Give back a slot whose request did not succeed"""
+        with self._rate_lock:
+            try:
+                self.request_times.remove(slot)
+            except ValueError:
+                pass  # already aged out of the window
     
     def chat_completion(self, 
                        messages: List[Dict[str, str]], 
@@ -41,15 +123,51 @@ class VercelAIGateway:
         if not self.api_key:
             return {"error": "AI_GATEWAY_API_KEY not configured"}
         
-        if not self._check_rate_limit():
+        slot = self._reserve_rate_limit()
+        if slot is None:
             return {"error": "Rate limit exceeded. Please wait before making another request."}
         
         try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
+            payload = {
+                "model": model,
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "temperature": temperature
             }
             
+            body = orjson.dumps(payload)
+            for attempt in range(_MAX_RETRIES + 1):
+                response = self._client.post("/chat/completions", content=body)
+                delay = _retry_after(response)
+                if delay is None or attempt == _MAX_RETRIES:
+                    break
+                time.sleep(delay)
+            
+            if response.status_code == 200:
+                return orjson.loads(response.content)
+            else:
+                self._release_rate_limit(slot)
+                return {"error": f"API request failed: {response.status_code} - {response.text}"}
+                
+        except Exception as e:
+            self._release_rate_limit(slot)
+            return {"error": f"Request failed: {str(e)}"}
+    
+    async def chat_completion_async(self,
+                                    messages: List[Dict[str, str]],
+                                    model: str = "gpt-4",
+                                    max_tokens: int = 1500,
+                                    temperature: float = 0.7) -> Dict[str, Any]:
+        """Async version of chat_completion"""
+        
+        if not self.api_key:
+            return {"error": "AI_GATEWAY_API_KEY not configured"}
+        
+        slot = self._reserve_rate_limit()
+        if slot is None:
+            return {"error": "Rate limit exceeded. Please wait before making another request."}
+        
+        try:
             payload = {
                 "model": model,
                 "messages": messages,
@@ -57,22 +175,32 @@ class VercelAIGateway:
                 "temperature": temperature
             }
             
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
+            body = orjson.dumps(payload)
+            for attempt in range(_MAX_RETRIES + 1):
+                response = await self._aclient.post("/chat/completions", content=body)
+                delay = _retry_after(response)
+                if delay is None or attempt == _MAX_RETRIES:
+                    break
+                await asyncio.sleep(delay)
             
             if response.status_code == 200:
-                self._update_rate_limit()
-                return response.json()
+                return orjson.loads(response.content)
             else:
+                self._release_rate_limit(slot)
                 return {"error": f"API request failed: {response.status_code} - {response.text}"}
                 
         except Exception as e:
+            self._release_rate_limit(slot)
             return {"error": f"Request failed: {str(e)}"}
     
+    async def generate_many(self,
+                            messages_list: List[List[Dict[str, str]]],
+                            **kwargs) -> List[Dict[str, Any]]:
+        """Run several chat completions concurrently, results in input order"""
+        return await asyncio.gather(
+            *(self.chat_completion_async(messages, **kwargs) for messages in messages_list)
+        )
+    
     def generate_grant_response(self, 
                               message: str, 
                               context: Dict[str, Any], 
@@ -173,7 +301,6 @@ Provide scores and specific recommendations for improvement."""
             eval_text = result["choices"][0]["message"]["content"].strip()
             
             # Extract scores using regex
-            import re
             scores = {
                 "cultural_sensitivity": self._extract_score(eval_text, "Cultural Sensitivity"),
                 "community_focus": self._extract_score(eval_text, "Community Focus"),
@@ -191,8 +318,7 @@ Provide scores and specific recommendations for improvement."""
     
     def _extract_score(self, text: str, dimension: str) -> int:
         """Extract score from evaluation text"""
-        pattern = rf"{dimension}.*?(\d+)"
-        match = re.search(pattern, text, re.IGNORECASE)
+        match = _SCORE_PATTERNS[dimension].search(text)
         return int(match.group(1)) if match else 0
     
     def _get_quality_level(self, score: int) -> str:
@@ -32,10 +32,10 @@ serve(async (req) => {
     }
   );
 
-  const { data, error } = await supabaseClient.rpc("rag_context_retrieval", {
+  const { data, error } = await supabaseClient.rpc("rag_context_top_chunk", {
     query_embedding: queryEmbedding,
     file_names: files,
-    project_id: project_id,
+    p_project_id: project_id,
   });
 
   if (error) {
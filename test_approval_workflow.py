@@ -5,6 +5,7 @@ This script tests the evaluation feedback loop and approval workflow.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 from datetime import datetime
@@ -13,6 +14,12 @@ from datetime import datetime
 API_BASE = "http://localhost:8080"  # Change to your API base URL
 TEST_PROJECT_ID = "test_project_approval"
 
+# One keep-alive session for every call, so only the first request pays
+# the TCP handshake
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
 def test_evaluation_feedback_loop():
     """Test the evaluation feedback loop functionality"""
     print("🧪 Testing Evaluation Feedback Loop...")
@@ -38,7 +45,7 @@ def test_evaluation_feedback_loop():
     
     try:
         # Send message to trigger evaluation
-        response = requests.post(f"{API_BASE}/chat/send_message", json={
+        response = SESSION.post(f"{API_BASE}/chat/send_message", json={
             "project_id": TEST_PROJECT_ID,
             "message": test_message,
             "context": test_context,
@@ -69,7 +76,7 @@ def test_approval_endpoints():
     
     # Test getting pending approvals
     try:
-        response = requests.get(f"{API_BASE}/approval/pending/{TEST_PROJECT_ID}")
+        response = SESSION.get(f"{API_BASE}/approval/pending/{TEST_PROJECT_ID}")
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Pending approvals retrieved: {len(data.get('pending_approvals', []))}")
@@ -81,7 +88,7 @@ def test_approval_endpoints():
     
     # Test getting approval statistics
     try:
-        response = requests.get(f"{API_BASE}/approval/stats/{TEST_PROJECT_ID}")
+        response = SESSION.get(f"{API_BASE}/approval/stats/{TEST_PROJECT_ID}")
         if response.status_code == 200:
             data = response.json()
             stats = data.get('statistics', {})
@@ -103,7 +110,7 @@ def test_cultural_evaluation():
     test_response = "Our tribal community health initiative will serve Native American families with culturally appropriate care."
     
     try:
-        response = requests.post(f"{API_BASE}/evaluate/cultural", json={
+        response = SESSION.post(f"{API_BASE}/evaluate/cultural", json={
             "response_text": test_response,
             "community_context": "Native American tribal community"
         })
@@ -132,7 +139,7 @@ def test_sensitivity_detection():
     
     try:
         # Test PII detection
-        response = requests.post(f"{API_BASE}/evaluate/cultural", json={
+        response = SESSION.post(f"{API_BASE}/evaluate/cultural", json={
             "response_text": test_response_with_pii,
             "community_context": "Tribal community"
         })
@@ -145,7 +152,7 @@ def test_sensitivity_detection():
             print(f"❌ Error testing PII detection: {response.status_code}")
             
         # Test cultural sensitivity detection
-        response = requests.post(f"{API_BASE}/evaluate/cultural", json={
+        response = SESSION.post(f"{API_BASE}/evaluate/cultural", json={
             "response_text": test_response_cultural,
             "community_context": "Native American tribal community"
         })
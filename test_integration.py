@@ -2,46 +2,166 @@
 """
 Integration test to verify all backend-frontend connections are working properly.
 This test checks that the evaluation feedback loop and approval workflow are properly connected.
+
+Run it as a script, or under pytest where each endpoint and sensitivity case is
+its own test and pytest-xdist can spread them across workers:
+
+    pip install -r requirements-test.txt
+    pytest -n auto test_integration.py
 """
 
-import requests
-import json
-import time
-from datetime import datetime
+import asyncio
+import sys
+import httpx
+import orjson
+import pytest
 
 # Configuration
 API_BASE = "http://localhost:8080"  # Change to your API base URL
 TEST_PROJECT_ID = "test_integration_project"
 
-def test_backend_frontend_connections():
+# Content that should trip each sensitivity check in the chat pipeline
+SENSITIVITY_CASES = [
+    {
+        "name": "PII Detection",
+        "content": "Contact John Smith at john.smith@tribalhealth.org or call 555-123-4567",
+        "expected_flags": ["Potential PII detected"]
+    },
+    {
+        "name": "Cultural Sensitivity",
+        "content": "Our tribal elders and traditional healers will guide this sacred health initiative for our indigenous community.",
+        "expected_flags": ["Multiple cultural references detected"]
+    },
+    {
+        "name": "Financial Data",
+        "content": "The project budget is $500,000 and we expect to serve 1000 community members.",
+        "expected_flags": ["Potential financial/confidential data detected"]
+    }
+]
+
+# Bodies are encoded with orjson, so the content type is set explicitly
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Request URLs are built once at import rather than on every call
+HEALTH_URL = f"{API_BASE}/health"
+CHAT_URL = f"{API_BASE}/chat/send_message"
+APPROVAL_PENDING_URL = f"{API_BASE}/approval/pending/{TEST_PROJECT_ID}"
+APPROVAL_STATS_URL = f"{API_BASE}/approval/stats/{TEST_PROJECT_ID}"
+EVALUATE_BATCH_URL = f"{API_BASE}/evaluate/batch"
+PERFORMANCE_SUMMARY_URL = f"{API_BASE}/performance/summary"
+
+# Wall-clock budget for each frontend endpoint probe, so one hung endpoint
+# can't hold up the run
+ENDPOINT_TIMEOUT = 5.0
+
+# API endpoints the frontend calls
+ENDPOINTS = tuple(
+    {"method": method, "path": path, "url": f"{API_BASE}{path}", "name": name}
+    for method, path, name in (
+        ("GET", "/projects", "Projects List"),
+        ("GET", "/context/test-project", "Project Context"),
+        ("GET", "/chat/history/test-project", "Chat History"),
+        ("GET", "/grant/sections/test-project", "Grant Sections"),
+        ("GET", "/privacy/audit/test-project", "Privacy Audit"),
+        ("GET", "/approval/pending/test-project", "Pending Approvals"),
+        ("GET", "/approval/stats/test-project", "Approval Statistics"),
+        ("GET", "/performance/summary", "Performance Summary"),
+        ("GET", "/evaluation/targets", "Evaluation Targets"),
+        ("GET", "/advanced/status", "Advanced Features Status")
+    )
+)
+
+# Async tests run on anyio's pytest plugin, which ships with httpx
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+def _new_client():
+    """Pooled client for the probes
+
+    Against an https API_BASE the concurrent probes are multiplexed over one
+    HTTP/2 connection. Chat calls wait on the LLM, so the timeout is far
+    above httpx's 5s default.
+    """
+    return httpx.AsyncClient(
+        base_url=API_BASE,
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=120.0
+    )
+
+# One pooled client per pytest(-xdist) worker, shared by every test
+@pytest.fixture(scope="session")
+async def client():
+    async with _new_client() as client:
+        yield client
+
+def _unwrap(result):
+    """Return a gathered result, re-raising it if the request failed"""
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+# Outcome of the /health probe. Once the API is known to be down the
+# remaining probes are skipped instead of each waiting on a dead connection
+_api_up = None
+
+async def _check_api(client):
+    """Probe /health once and cache whether the API is reachable"""
+    global _api_up
+    if _api_up is None:
+        try:
+            response = await client.get(HEALTH_URL)
+            _api_up = response.status_code == 200
+        except httpx.TransportError:
+            _api_up = False
+    return _api_up
+
+async def _send_chat_message(client, message, attempts=3):
+    """Post a chat message, retrying connection failures and timeouts
+
+    The LLM backend can be slow or flaky; waiting with asyncio.sleep keeps
+    the other in-flight probes moving during the backoff. A refused
+    connection means the API is down, so it is not retried.
+    """
+    global _api_up
+    for attempt in range(attempts):
+        try:
+            return await client.post(CHAT_URL, content=orjson.dumps({
+                "project_id": TEST_PROJECT_ID,
+                "message": message
+            }), headers=JSON_HEADERS)
+        except httpx.ConnectError:
+            _api_up = False
+            raise
+        except httpx.TransportError:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(2 ** attempt)
+
+async def test_backend_frontend_connections(client):
     """Test all backend-frontend connection points"""
     print("🧪 Testing Backend-Frontend Integration...")
+    failures = []
     
-    # Test 1: Basic API connectivity
+    # Test 1: Basic API connectivity; skipped like the other tests when the
+    # API is down
     print("\n1. Testing API connectivity...")
-    try:
-        response = requests.get(f"{API_BASE}/health")
-        if response.status_code == 200:
-            print("✅ API is accessible")
-        else:
-            print(f"❌ API health check failed: {response.status_code}")
-            return False
-    except Exception as e:
-        print(f"❌ API connectivity error: {e}")
-        return False
+    if not await _check_api(client):
+        pytest.skip("API is not reachable")
+    print("✅ API is accessible")
     
     # Test 2: Chat message flow with evaluation
     print("\n2. Testing chat message flow with evaluation...")
     test_message = "Write an executive summary for our tribal community health initiative"
     
     try:
-        response = requests.post(f"{API_BASE}/chat/send_message", json={
-            "project_id": TEST_PROJECT_ID,
-            "message": test_message
-        })
+        response = await _send_chat_message(client, test_message)
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if data.get('success'):
                 print("✅ Chat message sent successfully")
                 
@@ -62,206 +182,172 @@ def test_backend_frontend_connections():
                 else:
                     print("ℹ️ No approval needed for this response")
             else:
-                print(f"❌ Chat message failed: {data.get('error', 'Unknown error')}")
+                failures.append(f"Chat message failed: {data.get('error', 'Unknown error')}")
         else:
-            print(f"❌ Chat endpoint error: {response.status_code}")
+            failures.append(f"Chat endpoint error: {response.status_code}")
             
     except Exception as e:
-        print(f"❌ Error testing chat flow: {e}")
+        failures.append(f"Error testing chat flow: {e}")
+    
+    if not _api_up:
+        pytest.skip("API went away during the chat test: " + "; ".join(failures))
+    
+    # Tests 3-6 are independent probes, so they are sent together and
+    # reported in order once every response is back
+    test_response = "Our tribal community health initiative will serve Native American families with culturally appropriate care."
+    # Both evaluations share one payload, so they go in a single batch call
+    evaluation_payload = {
+        "response_text": test_response,
+        "community_context": "Native American tribal community",
+        "evaluators": ["cultural", "comprehensive"]
+    }
+    (pending_result, stats_result, evaluation_result,
+     performance_result) = await asyncio.gather(
+        client.get(APPROVAL_PENDING_URL),
+        client.get(APPROVAL_STATS_URL),
+        client.post(EVALUATE_BATCH_URL, content=orjson.dumps(evaluation_payload), headers=JSON_HEADERS),
+        client.get(PERFORMANCE_SUMMARY_URL),
+        return_exceptions=True
+    )
     
     # Test 3: Approval endpoints
     print("\n3. Testing approval endpoints...")
     
     # Test pending approvals
     try:
-        response = requests.get(f"{API_BASE}/approval/pending/{TEST_PROJECT_ID}")
+        response = _unwrap(pending_result)
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"✅ Pending approvals endpoint working: {len(data.get('pending_approvals', []))} pending")
         else:
-            print(f"❌ Pending approvals error: {response.status_code}")
+            failures.append(f"Pending approvals error: {response.status_code}")
     except Exception as e:
-        print(f"❌ Error testing pending approvals: {e}")
+        failures.append(f"Error testing pending approvals: {e}")
     
     # Test approval statistics
     try:
-        response = requests.get(f"{API_BASE}/approval/stats/{TEST_PROJECT_ID}")
+        response = _unwrap(stats_result)
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             stats = data.get('statistics', {})
             print(f"✅ Approval stats endpoint working:")
             print(f"   - Total requests: {stats.get('total_requests', 0)}")
             print(f"   - Pending: {stats.get('pending', 0)}")
         else:
-            print(f"❌ Approval stats error: {response.status_code}")
+            failures.append(f"Approval stats error: {response.status_code}")
     except Exception as e:
-        print(f"❌ Error testing approval stats: {e}")
+        failures.append(f"Error testing approval stats: {e}")
     
     # Test 4: Evaluation endpoints
     print("\n4. Testing evaluation endpoints...")
     
-    test_response = "Our tribal community health initiative will serve Native American families with culturally appropriate care."
-    
     try:
-        response = requests.post(f"{API_BASE}/evaluate/cultural", json={
-            "response_text": test_response,
-            "community_context": "Native American tribal community"
-        })
+        response = _unwrap(evaluation_result)
         
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if data.get('success'):
-                evaluation = data.get('evaluation', {})
+                evaluations = data.get('evaluations', {})
+                
+                # Test 4: Cultural evaluation
+                evaluation = evaluations.get('cultural', {})
                 print(f"✅ Cultural evaluation working:")
                 print(f"   - Overall cultural score: {evaluation.get('overall_cultural_score', 'N/A')}")
                 print(f"   - Recommendations: {len(evaluation.get('recommendations', []))}")
-            else:
-                print(f"❌ Cultural evaluation failed: {data.get('error', 'Unknown error')}")
-        else:
-            print(f"❌ Cultural evaluation endpoint error: {response.status_code}")
-    except Exception as e:
-        print(f"❌ Error testing cultural evaluation: {e}")
-    
-    # Test 5: Comprehensive evaluation
-    try:
-        response = requests.post(f"{API_BASE}/evaluate/comprehensive", json={
-            "response_text": test_response,
-            "community_context": "Native American tribal community"
-        })
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('success'):
-                evaluation = data.get('evaluation', {})
+                
+                # Test 5: Comprehensive evaluation
+                evaluation = evaluations.get('comprehensive', {})
                 print(f"✅ Comprehensive evaluation working:")
                 print(f"   - Overall quality score: {evaluation.get('overall_quality_score', 'N/A')}")
                 print(f"   - Quality level: {evaluation.get('quality_level', 'N/A')}")
             else:
-                print(f"❌ Comprehensive evaluation failed: {data.get('error', 'Unknown error')}")
+                failures.append(f"Batch evaluation failed: {data.get('error', 'Unknown error')}")
         else:
-            print(f"❌ Comprehensive evaluation endpoint error: {response.status_code}")
+            failures.append(f"Batch evaluation endpoint error: {response.status_code}")
     except Exception as e:
-        print(f"❌ Error testing comprehensive evaluation: {e}")
+        failures.append(f"Error testing batch evaluation: {e}")
     
     # Test 6: Performance monitoring
     print("\n5. Testing performance monitoring...")
     
     try:
-        response = requests.get(f"{API_BASE}/performance/summary")
+        response = _unwrap(performance_result)
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if data.get('success'):
                 print("✅ Performance monitoring working")
                 summary = data.get('summary', {})
                 if summary:
                     print(f"   - Operations recorded: {len(summary.get('operations', []))}")
             else:
-                print(f"❌ Performance monitoring failed: {data.get('error', 'Unknown error')}")
+                failures.append(f"Performance monitoring failed: {data.get('error', 'Unknown error')}")
         else:
-            print(f"❌ Performance monitoring endpoint error: {response.status_code}")
+            failures.append(f"Performance monitoring endpoint error: {response.status_code}")
     except Exception as e:
-        print(f"❌ Error testing performance monitoring: {e}")
+        failures.append(f"Error testing performance monitoring: {e}")
     
-    return True
+    # Every probe is reported before failing, rather than stopping at the first
+    if failures:
+        pytest.fail("\n".join(failures))
 
-def test_sensitivity_detection():
-    """Test sensitivity detection with various content types"""
-    print("\n🧪 Testing Sensitivity Detection...")
+@pytest.mark.parametrize("test_case", SENSITIVITY_CASES, ids=lambda case: case["name"])
+async def test_sensitivity_detection(client, test_case):
+    """Test sensitivity detection for one content type"""
+    if not await _check_api(client):
+        pytest.skip("API is not reachable")
     
-    test_cases = [
-        {
-            "name": "PII Detection",
-            "content": "Contact John Smith at john.smith@tribalhealth.org or call 555-123-4567",
-            "expected_flags": ["Potential PII detected"]
-        },
-        {
-            "name": "Cultural Sensitivity",
-            "content": "Our tribal elders and traditional healers will guide this sacred health initiative for our indigenous community.",
-            "expected_flags": ["Multiple cultural references detected"]
-        },
-        {
-            "name": "Financial Data",
-            "content": "The project budget is $500,000 and we expect to serve 1000 community members.",
-            "expected_flags": ["Potential financial/confidential data detected"]
-        }
-    ]
+    print(f"\nTesting: {test_case['name']}")
+    try:
+        response = await _send_chat_message(client, f"Write about: {test_case['content']}")
+    except Exception as e:
+        pytest.fail(f"Error testing sensitivity detection: {e}")
     
-    for test_case in test_cases:
-        print(f"\nTesting: {test_case['name']}")
-        try:
-            response = requests.post(f"{API_BASE}/chat/send_message", json={
-                "project_id": TEST_PROJECT_ID,
-                "message": f"Write about: {test_case['content']}"
-            })
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('success'):
-                    response_text = data.get('response', '')
-                    if 'flagged for approval' in response_text.lower():
-                        print(f"✅ Sensitivity detected correctly")
-                    else:
-                        print(f"ℹ️ No sensitivity detected")
-                else:
-                    print(f"❌ Test failed: {data.get('error', 'Unknown error')}")
-            else:
-                print(f"❌ Test error: {response.status_code}")
-        except Exception as e:
-            print(f"❌ Error testing sensitivity detection: {e}")
+    assert response.status_code == 200, f"Test error: {response.status_code}"
+    data = orjson.loads(response.content)
+    assert data.get('success'), f"Test failed: {data.get('error', 'Unknown error')}"
+    
+    response_text = data.get('response', '')
+    if 'flagged for approval' in response_text.lower():
+        print(f"✅ Sensitivity detected correctly")
+    else:
+        print(f"ℹ️ No sensitivity detected")
 
-def test_frontend_api_endpoints():
-    """Test all API endpoints that the frontend uses"""
-    print("\n🧪 Testing Frontend API Endpoints...")
+@pytest.mark.parametrize("endpoint", ENDPOINTS, ids=lambda endpoint: endpoint["path"])
+async def test_frontend_api_endpoints(client, endpoint):
+    """Test one API endpoint that the frontend uses"""
+    if not await _check_api(client):
+        pytest.skip("API is not reachable")
     
-    endpoints = [
-        {"method": "GET", "url": "/projects", "name": "Projects List"},
-        {"method": "GET", "url": "/context/test-project", "name": "Project Context"},
-        {"method": "GET", "url": "/chat/history/test-project", "name": "Chat History"},
-        {"method": "GET", "url": "/grant/sections/test-project", "name": "Grant Sections"},
-        {"method": "GET", "url": "/privacy/audit/test-project", "name": "Privacy Audit"},
-        {"method": "GET", "url": "/approval/pending/test-project", "name": "Pending Approvals"},
-        {"method": "GET", "url": "/approval/stats/test-project", "name": "Approval Statistics"},
-        {"method": "GET", "url": "/performance/summary", "name": "Performance Summary"},
-        {"method": "GET", "url": "/evaluation/targets", "name": "Evaluation Targets"},
-        {"method": "GET", "url": "/advanced/status", "name": "Advanced Features Status"}
-    ]
+    try:
+        response = await asyncio.wait_for(
+            client.request(endpoint["method"], endpoint["url"]),
+            timeout=ENDPOINT_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        pytest.fail(f"{endpoint['name']}: No response within {ENDPOINT_TIMEOUT}s")
+    except Exception as e:
+        pytest.fail(f"{endpoint['name']}: Connection error - {e}")
     
-    for endpoint in endpoints:
-        try:
-            if endpoint["method"] == "GET":
-                response = requests.get(f"{API_BASE}{endpoint['url']}")
-            else:
-                response = requests.post(f"{API_BASE}{endpoint['url']}")
-            
-            if response.status_code == 200:
-                print(f"✅ {endpoint['name']}: Working")
-            else:
-                print(f"❌ {endpoint['name']}: Error {response.status_code}")
-        except Exception as e:
-            print(f"❌ {endpoint['name']}: Connection error - {e}")
+    assert response.status_code == 200, f"{endpoint['name']}: Error {response.status_code}"
+    print(f"✅ {endpoint['name']}: Working")
 
 def main():
-    """Run all integration tests"""
+    """Entry point for running the integration tests as a script
+
+    Extra arguments are passed through to pytest, e.g. ``-n auto``.
+    """
     print("🚀 Starting Backend-Frontend Integration Tests...")
     print(f"API Base: {API_BASE}")
     print(f"Test Project ID: {TEST_PROJECT_ID}")
     print("=" * 60)
     
-    # Test basic connectivity and core functionality
-    if test_backend_frontend_connections():
-        print("\n✅ Core integration tests passed!")
-    else:
-        print("\n❌ Core integration tests failed!")
-        return
-    
-    # Test sensitivity detection
-    test_sensitivity_detection()
-    
-    # Test all frontend API endpoints
-    test_frontend_api_endpoints()
+    exit_code = pytest.main([__file__, "-s", *sys.argv[1:]])
     
     print("\n" + "=" * 60)
-    print("✅ Integration Testing Completed!")
+    if exit_code == 0:
+        print("✅ Integration Testing Completed!")
+    else:
+        print("❌ Integration tests failed!")
     print("\nNext Steps:")
     print("1. Start your frontend application")
     print("2. Navigate to the Chat section")
@@ -269,6 +355,7 @@ def main():
     print("4. Check the Approvals tab for flagged content")
     print("5. Test approval/denial workflows")
     print("6. Monitor evaluation scores in chat responses")
+    return exit_code
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -3,23 +3,41 @@
 Minimal FastAPI test for Railway deployment
 """
 
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from datetime import datetime
 
-app = FastAPI(title="Test API", version="1.0.0")
+app = FastAPI(title="Test API", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Second-resolution timestamp shared by every response, refreshed in the
+# background instead of formatted per request
+CACHED_TS = datetime.now().isoformat()
+
+async def update_ts():
+    global CACHED_TS
+    while True:
+        await asyncio.sleep(1)
+        CACHED_TS = datetime.now().isoformat()
+
+@app.on_event("startup")
+async def start_timestamp_updater():
+    # Keep a reference so the task isn't garbage collected
+    app.state.timestamp_task = asyncio.create_task(update_ts())
 
 @app.get("/")
 async def root():
-    return {"message": "Hello World", "timestamp": datetime.now().isoformat()}
+    return {"message": "Hello World", "timestamp": CACHED_TS}
 
 @app.get("/test")
 async def test():
-    return {"message": "Test endpoint working", "timestamp": datetime.now().isoformat()}
+    return {"message": "Test endpoint working", "timestamp": CACHED_TS}
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "timestamp": CACHED_TS}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # uvloop and httptools come with uvicorn[standard]
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="uvloop", http="httptools")